@@ -189,6 +189,12 @@ function App() {
       // Use streaming for real-time updates
       console.log('[sendMessage] Starting streaming execution');
       
+      // Nodes whose LLM tokens are currently being shown as live messages.
+      // Parallel nodes (e.g. planner and travel_plan) can interleave, so each
+      // preview is tracked by its own position in the message list.
+      const streamingNodes = new Set<string>();
+      const previewIndex = new Map<string, number>();
+      
       for await (const event of api.streamAgent({
         thread_id: currentThreadId,
         message: shouldContinue ? '' : message,
@@ -204,10 +210,42 @@ function App() {
           // Add the message to the chat if present
           if (event.data.message) {
             console.log('💬 [sendMessage] Adding streamed message:', event.data.message);
-            setMessages(prev => [...prev, {
+            const finalMessage = {
               type: event.data.message!.type as any,
               content: event.data.message!.content,
-            }]);
+            };
+            if (streamingNodes.has(event.node)) {
+              // Replace this node's live token preview with its final message
+              const node = event.node;
+              setMessages(prev => {
+                const next = [...prev];
+                next[previewIndex.get(node)!] = finalMessage;
+                return next;
+              });
+            } else {
+              setMessages(prev => [...prev, finalMessage]);
+            }
+          }
+          streamingNodes.delete(event.node);
+          
+        } else if (event.event === 'token') {
+          // Live LLM output - grow one preview message per node as tokens arrive
+          setCurrentNode(event.node);
+          const node = event.node;
+          const token = event.content;
+          if (!streamingNodes.has(node)) {
+            streamingNodes.add(node);
+            setMessages(prev => {
+              previewIndex.set(node, prev.length);
+              return [...prev, { type: 'AIMessage', content: token }];
+            });
+          } else {
+            setMessages(prev => {
+              const i = previewIndex.get(node)!;
+              const next = [...prev];
+              next[i] = { ...prev[i], content: prev[i].content + token };
+              return next;
+            });
           }
           
         } else if (event.event === 'interrupt') {
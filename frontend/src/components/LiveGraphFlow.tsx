@@ -52,7 +52,7 @@ export function LiveGraphFlow({
     {
       id: 'planner',
       data: { label: '📝 Planner' },
-      position: { x: 275, y: 130 },
+      position: { x: 100, y: 200 },
       draggable: false,
       selectable: false,
       sourcePosition: Position.Bottom,
@@ -71,7 +71,7 @@ export function LiveGraphFlow({
     {
       id: 'travel_plan',
       data: { label: '🗺️ Travel Planning\n🔍 Web Search' },
-      position: { x: 230, y: 240 },
+      position: { x: 360, y: 190 },
       draggable: false,
       selectable: false,
       sourcePosition: Position.Bottom,
@@ -178,14 +178,23 @@ export function LiveGraphFlow({
       markerEnd: { type: MarkerType.ArrowClosed, color: '#888' },
     },
     {
-      id: 'e-planner-travel_plan',
-      source: 'planner',
+      id: 'e-start-travel_plan',
+      source: 'START',
       target: 'travel_plan',
       type: 'smoothstep',
       animated: false,
       style: { stroke: '#888', strokeWidth: 2 },
       markerEnd: { type: MarkerType.ArrowClosed, color: '#888' },
     },
+    {
+      id: 'e-planner-generate',
+      source: 'planner',
+      target: 'generate',
+      type: 'smoothstep',
+      animated: false,
+      style: { stroke: '#888', strokeWidth: 2 },
+      markerEnd: { type: MarkerType.ArrowClosed, color: '#888' },
+    },
     {
       id: 'e-travel_plan-generate',
       source: 'travel_plan',
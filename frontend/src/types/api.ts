@@ -149,6 +149,7 @@ export interface HealthResponse {
 // Streaming event types
 export type StreamEvent = 
   | StreamNodeEvent 
+  | StreamTokenEvent 
   | StreamInterruptEvent 
   | StreamCompleteEvent 
   | StreamErrorEvent;
@@ -168,6 +169,12 @@ export interface StreamNodeEvent {
   };
 }
 
+export interface StreamTokenEvent {
+  event: 'token';
+  node: string;
+  content: string;
+}
+
 export interface StreamInterruptEvent {
   event: 'interrupt';
   next: string[];
@@ -2,13 +2,24 @@
 
 import os
 import json
-import re
-import boto3
-from typing import Annotated, TypedDict, Optional
+import asyncio
+import hashlib
+import threading
+import uuid
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated, Any, TypedDict, Optional
 from typing_extensions import TypedDict as TypedDictExt
 
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, BaseMessage
+from langchain_core.messages import (
+    AIMessage,
+    ToolMessage,
+    BaseMessage,
+    SystemMessage,
+)
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
@@ -16,6 +27,9 @@ from langgraph.checkpoint.postgres import PostgresSaver
 
 from .tools import tools, tools_by_name
 
+if TYPE_CHECKING:
+    from langchain_aws import ChatBedrock
+
 
 # System prompt for NLP-based tool detection
 SYSTEM_PROMPT = """You are a helpful AI assistant with access to tools. When you need to use a tool, respond with a JSON object in this exact format:
@@ -54,6 +68,12 @@ You: "I'm doing well! How can I help you today?"
 """
 
 
+# Max number of cached model responses. Off by default: a cache hit replays
+# an earlier completion, which hides the effect of re-running a turn. Only
+# temperature-0 requests are cached even when enabled
+LLM_RESPONSE_CACHE_SIZE = int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "0"))
+
+
 # Define agent state with editable prompts
 class AgentState(TypedDict):
     """The agent's working memory - now includes editable prompts for classroom use!"""
@@ -64,11 +84,28 @@ class AgentState(TypedDict):
     max_tokens: Optional[int]  # Editable max tokens
 
 
+_json_decoder = json.JSONDecoder()
+
+
+def _tool_call_from(parsed: Any) -> Optional[dict]:
+    """Build a tool call from a decoded JSON value, if it is one.
+
+    IDs are random so they stay unique across threads and server restarts.
+    """
+    if isinstance(parsed, dict) and "tool" in parsed and "args" in parsed:
+        return {
+            "name": parsed["tool"],
+            "args": parsed["args"],
+            "id": f"call_{uuid.uuid4().hex[:16]}",
+        }
+    return None
+
+
 def parse_tool_call(content: str) -> Optional[dict]:
     """Parse LLM output to detect tool calls using NLP.
 
     This is the workaround for AWS Nova Lite which doesn't support native tool calling.
-    We use JSON parsing and regex patterns to detect tool intents.
+    We scan the output for a JSON object with "tool" and "args" keys.
 
     Args:
         content: The LLM's text output
@@ -79,78 +116,111 @@ def parse_tool_call(content: str) -> Optional[dict]:
     if not content or not isinstance(content, str):
         return None
 
-    content = content.strip()
+    # Plain-text replies (most turns) can't contain a tool call: skip the
+    # decode work unless there is a JSON object to look at
+    if "{" not in content:
+        return None
 
-    # Try JSON parsing first (most reliable)
-    if content.startswith("{") and content.endswith("}"):
-        try:
-            parsed = json.loads(content)
-            if "tool" in parsed and "args" in parsed:
-                return {
-                    "name": parsed["tool"],
-                    "args": parsed["args"],
-                    "id": f"call_{hash(content) % 100000}",
-                }
-        except json.JSONDecodeError:
-            pass
+    # Fast path: the whole output is the JSON tool call. orjson skips
+    # surrounding whitespace itself and fails at the first unexpected
+    # character, so no strip()/startswith/endswith pre-pass is needed.
+    try:
+        tool_call = _tool_call_from(orjson.loads(content))
+    except orjson.JSONDecodeError:
+        tool_call = None
+    if tool_call:
+        return tool_call
 
-    # Fallback: Try regex patterns
-    # Pattern: {"tool": "name", "args": {...}}
-    json_pattern = r'\{"tool":\s*"([^"]+)",\s*"args":\s*(\{[^}]+\})\}'
-    match = re.search(json_pattern, content)
-    if match:
+    # Scan each "{" with raw_decode: the C JSON decoder handles nested args
+    # and finds tool calls even when the model adds text around the JSON
+    start = content.find("{")
+    while start != -1:
         try:
-            tool_name = match.group(1)
-            args_str = match.group(2)
-            args = json.loads(args_str)
-            return {
-                "name": tool_name,
-                "args": args,
-                "id": f"call_{hash(content) % 100000}",
-            }
-        except:
-            pass
+            parsed, _ = _json_decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            parsed = None
+        tool_call = _tool_call_from(parsed)
+        if tool_call:
+            return tool_call
+        start = content.find("{", start + 1)
 
     return None
 
 
-def call_model(state: AgentState):
-    """Call the AI model with NLP tool detection.
+@lru_cache(maxsize=4)
+def _get_bedrock_client(region: str):
+    """Create the Bedrock runtime client once per region.
 
-    Now supports editable prompts and parameters from state!
-    Students can modify these to experiment with agent behavior.
+    Building a boto3 client loads botocore service models and resolves
+    endpoints, so it is shared across turns (and its HTTP pool across
+    concurrent requests).
     """
-    messages = state["messages"]
+    # Imported on first use: boto3/botocore are slow to import and not needed
+    # just to build the graph or parse tool calls
+    import boto3
+    from botocore.config import Config
 
-    # Get editable prompts/parameters from state (with defaults)
-    system_prompt = state.get("agent_system_prompt", SYSTEM_PROMPT)
-    temperature = state.get("temperature", 0.1)
-    max_tokens = state.get("max_tokens", 4096)
-
-    # Initialize Bedrock client
-    AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-    AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-    AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
-
-    bedrock_runtime = boto3.client(
+    return boto3.client(
         service_name="bedrock-runtime",
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=region,
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        config=Config(
+            max_pool_connections=32,
+            retries={"max_attempts": 2, "mode": "standard"},
+        ),
     )
 
-    llm = ChatBedrock(
-        client=bedrock_runtime,
+
+@lru_cache(maxsize=16)
+def _get_llm(region: str, temperature: float, max_tokens: int):
+    """Get a ChatBedrock instance for the given parameters (cached)."""
+    from langchain_aws import ChatBedrock
+
+    return ChatBedrock(
+        client=_get_bedrock_client(region),
         model_id="amazon.nova-lite-v1:0",
         model_kwargs={"temperature": temperature, "max_tokens": max_tokens},
     )
 
+
+@lru_cache(maxsize=32)
+def _system_message(system_prompt: str) -> SystemMessage:
+    """Build the system message for a prompt, with a Bedrock cache point.
+
+    The cachePoint after the static tool instructions lets Bedrock reuse the
+    processed prompt on later turns; the conversation comes after it, so the
+    cached prefix stays the same from turn to turn.
+    """
+    return SystemMessage(
+        content=[
+            {"type": "text", "text": system_prompt},
+            {"cachePoint": {"type": "default"}},
+        ]
+    )
+
+
+def _prepare_model_call(state: AgentState):
+    """Get the LLM and the prompt (system prompt + history) for a model turn."""
+    messages = state["messages"]
+
+    # Get editable prompts/parameters from state (with defaults)
+    # (a field explicitly set to None also falls back to the default prompt)
+    system_prompt = state.get("agent_system_prompt") or SYSTEM_PROMPT
+    temperature = state.get("temperature", 0.1)
+    max_tokens = state.get("max_tokens", 4096)
+
+    # Reuse the cached Bedrock client and model
+    llm = _get_llm(os.getenv("AWS_REGION", "us-east-1"), temperature, max_tokens)
+
     # Prepend system message with tool instructions (now editable!)
-    messages_with_system = [HumanMessage(content=system_prompt)] + messages
+    messages_with_system = [_system_message(system_prompt)] + messages
+
+    return llm, messages_with_system
 
-    # Get LLM response
-    response = llm.invoke(messages_with_system)
 
+def _model_response_update(response: AIMessage):
+    """Turn the LLM response into a state update (tool call or text)."""
     # Parse for tool calls using NLP
     tool_call = parse_tool_call(response.content)
 
@@ -165,70 +235,196 @@ def call_model(state: AgentState):
         return {"messages": [response]}
 
 
+# LRU cache of model response texts keyed by request hash
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+# Compact, key-sorted encoder built once (json.dumps with options builds a
+# new JSONEncoder on every call)
+_cache_key_encoder = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+)
+
+
+def _response_cache_key(llm: "ChatBedrock", messages: list) -> Optional[str]:
+    """Hash the model, its parameters and the full prompt.
+
+    Returns None when the response must not be cached (cache disabled, or
+    temperature > 0 so a replay should sample a new completion).
+    """
+    if LLM_RESPONSE_CACHE_SIZE <= 0 or llm.temperature:
+        return None
+    payload = _cache_key_encoder.encode(
+        [
+            llm.model_id,
+            llm.temperature,
+            llm.max_tokens,
+            llm.model_kwargs,
+            [
+                (m.type, m.content, getattr(m, "tool_calls", None))
+                for m in messages
+            ],
+        ]
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _get_cached_response(key: Optional[str]) -> Optional[AIMessage]:
+    """Return a fresh AIMessage for a cached response, or None."""
+    if key is None:
+        return None
+    with _response_cache_lock:
+        content = _response_cache.get(key)
+        if content is None:
+            return None
+        _response_cache.move_to_end(key)
+    return AIMessage(content=content)
+
+
+def _cache_response(key: Optional[str], response: AIMessage):
+    """Remember the response text for an identical later request."""
+    if key is None:
+        return
+    with _response_cache_lock:
+        _response_cache[key] = response.content
+        if len(_response_cache) > LLM_RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+def call_model(state: AgentState):
+    """Call the AI model with NLP tool detection.
+
+    Now supports editable prompts and parameters from state!
+    Students can modify these to experiment with agent behavior.
+    """
+    llm, messages_with_system = _prepare_model_call(state)
+
+    # Get LLM response (identical requests are answered from the cache)
+    key = _response_cache_key(llm, messages_with_system)
+    response = _get_cached_response(key)
+    if response is None:
+        response = llm.invoke(messages_with_system)
+        _cache_response(key, response)
+
+    return _model_response_update(response)
+
+
+async def acall_model(state: AgentState):
+    """Async version of call_model, used when the graph runs with ainvoke/astream.
+
+    Awaiting the Bedrock call keeps the event loop free for other sessions
+    while the model is generating.
+    """
+    llm, messages_with_system = _prepare_model_call(state)
+
+    # Get LLM response (identical requests are answered from the cache)
+    key = _response_cache_key(llm, messages_with_system)
+    response = _get_cached_response(key)
+    if response is None:
+        response = await llm.ainvoke(messages_with_system)
+        _cache_response(key, response)
+
+    return _model_response_update(response)
+
+
 def should_continue(state: AgentState):
     """Decide if we should call tools or finish."""
     messages = state["messages"]
     last_message = messages[-1]
 
     # Check if the AI wants to use tools
-    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+    if getattr(last_message, "tool_calls", None):
         return "tools"
 
     # Otherwise, we're done
     return END
 
 
+def _tool_error_message(tool_call: dict, error: Exception) -> ToolMessage:
+    return ToolMessage(
+        content=f"Error executing tool: {str(error)}",
+        tool_call_id=tool_call["id"],
+        name=tool_call["name"],
+    )
+
+
+def _tool_not_found_message(tool_call: dict) -> ToolMessage:
+    return ToolMessage(
+        content=f"Tool '{tool_call['name']}' not found",
+        tool_call_id=tool_call["id"],
+        name=tool_call["name"],
+    )
+
+
+def _run_tool(tool_call: dict) -> ToolMessage:
+    """Execute a single tool call and wrap the result in a ToolMessage."""
+    tool = tools_by_name.get(tool_call["name"])
+    if not tool:
+        return _tool_not_found_message(tool_call)
+
+    try:
+        result = tool.invoke(tool_call["args"])
+    except Exception as e:
+        return _tool_error_message(tool_call, e)
+    return ToolMessage(
+        content=str(result), tool_call_id=tool_call["id"], name=tool_call["name"]
+    )
+
+
+async def _arun_tool(tool_call: dict) -> ToolMessage:
+    """Async version of _run_tool (sync-only tools run in a worker thread)."""
+    tool = tools_by_name.get(tool_call["name"])
+    if not tool:
+        return _tool_not_found_message(tool_call)
+
+    try:
+        result = await tool.ainvoke(tool_call["args"])
+    except Exception as e:
+        return _tool_error_message(tool_call, e)
+    return ToolMessage(
+        content=str(result), tool_call_id=tool_call["id"], name=tool_call["name"]
+    )
+
+
+# Worker threads for running several tool calls of one turn at once
+_tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent-tools")
+
+
 def call_tools(state: AgentState):
-    """Execute tool calls."""
+    """Execute tool calls.
+
+    Multiple tool calls run concurrently (results keep the call order), so
+    network-bound tools like web search take max(t) instead of sum(t).
+    """
+    messages = state["messages"]
+    last_message = messages[-1]
+
+    tool_calls = getattr(last_message, "tool_calls", None) or []
+    if len(tool_calls) <= 1:
+        return {"messages": [_run_tool(tool_call) for tool_call in tool_calls]}
+
+    return {"messages": list(_tool_pool.map(_run_tool, tool_calls))}
+
+
+async def acall_tools(state: AgentState):
+    """Async version of call_tools, running the tool calls with asyncio.gather."""
     messages = state["messages"]
     last_message = messages[-1]
 
-    tool_messages = []
-
-    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-        for tool_call in last_message.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            tool_id = tool_call["id"]
-
-            # Get the tool
-            tool = tools_by_name.get(tool_name)
-
-            if tool:
-                try:
-                    # Execute the tool
-                    result = tool.invoke(tool_args)
-                    tool_messages.append(
-                        ToolMessage(
-                            content=str(result), tool_call_id=tool_id, name=tool_name
-                        )
-                    )
-                except Exception as e:
-                    tool_messages.append(
-                        ToolMessage(
-                            content=f"Error executing tool: {str(e)}",
-                            tool_call_id=tool_id,
-                            name=tool_name,
-                        )
-                    )
-            else:
-                tool_messages.append(
-                    ToolMessage(
-                        content=f"Tool '{tool_name}' not found",
-                        tool_call_id=tool_id,
-                        name=tool_name,
-                    )
-                )
-
-    return {"messages": tool_messages}
+    tool_calls = getattr(last_message, "tool_calls", None) or []
+    tool_messages = await asyncio.gather(
+        *[_arun_tool(tool_call) for tool_call in tool_calls]
+    )
+    return {"messages": list(tool_messages)}
 
 
 # Create the graph
 workflow = StateGraph(AgentState)
 
 # Add nodes
-workflow.add_node("agent", call_model)
-workflow.add_node("tools", call_tools)
+# Sync runs (invoke/stream) use call_model/call_tools, async runs
+# (ainvoke/astream, LangGraph server) await acall_model/acall_tools
+workflow.add_node("agent", RunnableLambda(call_model, afunc=acall_model))
+workflow.add_node("tools", RunnableLambda(call_tools, afunc=acall_tools))
 
 # Define the flow
 workflow.add_edge(START, "agent")
@@ -252,26 +448,66 @@ def get_postgres_checkpointer():
     )
 
     # Create connection pool (handles concurrent connections)
+    # Checkpoint writes already use psycopg pipeline mode inside PostgresSaver;
+    # keep a few connections warm. PostgresSaver runs the same handful of
+    # queries over and over, so prepare_threshold=0 server-prepares each one
+    # on its first execution (psycopg's default 5 re-plans it five times per
+    # connection first). Behind pgbouncer in transaction mode prepared
+    # statements break: set POSTGRES_PREPARE_THRESHOLD=none to disable them.
+    prepare_threshold = os.getenv("POSTGRES_PREPARE_THRESHOLD", "0").strip()
     pool = ConnectionPool(
         conninfo=db_uri,
+        min_size=int(os.getenv("POSTGRES_POOL_MIN_SIZE", "4")),
         max_size=50,  # Increase for larger classes (adjust based on class size)
-        kwargs={"autocommit": True, "prepare_threshold": 0},
+        kwargs={
+            "autocommit": True,
+            "prepare_threshold": (
+                None
+                if prepare_threshold.lower() in ("", "none")
+                else int(prepare_threshold)
+            ),
+        },
     )
 
     # Setup tables and return saver
     return PostgresSaver(pool)
 
 
-# Initialize checkpointer
-memory = get_postgres_checkpointer()
-memory.setup()  # Create tables if they don't exist
+@lru_cache(maxsize=None)
+def get_memory() -> PostgresSaver:
+    """Create the shared Postgres checkpointer on first use.
+
+    Connecting and creating tables happens here rather than at import time, so
+    helpers like parse_tool_call can be imported without a database.
+    """
+    memory = get_postgres_checkpointer()
+    memory.setup()  # Create tables if they don't exist
+    return memory
+
+
+@lru_cache(maxsize=None)
+def get_graphs() -> tuple:
+    """Compile (graph, graph_no_interrupt) against the shared checkpointer."""
+    memory = get_memory()
+
+    # Compile the graph WITH persistence and HITL support
+    # interrupt_before=["tools"] enables human-in-the-loop
+    graph = workflow.compile(
+        checkpointer=memory,
+        interrupt_before=["tools"],  # Pause before executing tools for human approval
+    )
+
+    # Also create a version without interrupts for direct execution
+    graph_no_interrupt = workflow.compile(checkpointer=memory)
+    return graph, graph_no_interrupt
 
-# Compile the graph WITH persistence and HITL support
-# interrupt_before=["tools"] enables human-in-the-loop
-graph = workflow.compile(
-    checkpointer=memory,
-    interrupt_before=["tools"],  # Pause before executing tools for human approval
-)
 
-# Also create a version without interrupts for direct execution
-graph_no_interrupt = workflow.compile(checkpointer=memory)
+def __getattr__(name: str):
+    # Module-level memory / graph / graph_no_interrupt, built lazily
+    if name == "memory":
+        return get_memory()
+    if name == "graph":
+        return get_graphs()[0]
+    if name == "graph_no_interrupt":
+        return get_graphs()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,10 +10,17 @@ Educational Enhancement:
 - Better introspection and documentation
 """
 
-from typing import Dict, Any, Optional, List, TypedDict, TYPE_CHECKING
+import io
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Iterator, TypedDict, TYPE_CHECKING
+
+import orjson
+from langgraph.channels.binop import BinaryOperatorAggregate
+from langgraph.types import Overwrite
 from langchain_core.messages import (
     HumanMessage,
     AIMessage,
+    AIMessageChunk,
     SystemMessage,
     ToolMessage,
     BaseMessage,
@@ -130,6 +137,7 @@ FIELD_DESCRIPTIONS = {
     "plan": "The trip outline created by the planner node",
     "draft": "The current trip itinerary",
     "critique": "Feedback from the travel advisor on the itinerary",
+    "critique_converged": "True when the latest critique nearly repeats the previous one, so revising stops early",
     "content": "Research content gathered from searches",
     "queries": "Search queries used to find information",
     "revision_number": "Current revision iteration (1, 2, 3...)",
@@ -147,6 +155,49 @@ FIELD_DESCRIPTIONS = {
 }
 
 
+def _build_human_message(msg: Dict[str, Any]) -> HumanMessage:
+    return HumanMessage(content=msg.get("content", ""))
+
+
+def _build_ai_message(msg: Dict[str, Any]) -> AIMessage:
+    # Handle tool calls if present
+    tool_calls = msg.get("tool_calls", [])
+    if tool_calls:
+        return AIMessage(content=msg.get("content", ""), tool_calls=tool_calls)
+    return AIMessage(content=msg.get("content", ""))
+
+
+def _build_system_message(msg: Dict[str, Any]) -> SystemMessage:
+    return SystemMessage(content=msg.get("content", ""))
+
+
+def _build_tool_message(msg: Dict[str, Any]) -> ToolMessage:
+    # ToolMessage requires tool_call_id
+    tool_call_id = msg.get("tool_call_id", msg.get("id", ""))
+    return ToolMessage(content=msg.get("content", ""), tool_call_id=tool_call_id)
+
+
+# Message constructors for deserialize_messages, keyed by class name and
+# LangChain message type
+_MESSAGE_BUILDERS = {
+    "HumanMessage": _build_human_message,
+    "human": _build_human_message,
+    "AIMessage": _build_ai_message,
+    "ai": _build_ai_message,
+    "SystemMessage": _build_system_message,
+    "system": _build_system_message,
+    "ToolMessage": _build_tool_message,
+    "tool": _build_tool_message,
+}
+
+
+# Values of these exact types go into API responses unchanged
+_JSON_SCALAR_TYPES = frozenset({dict, str, int, float, bool, type(None)})
+
+# Sentinel for "state not fetched yet" in StateManager
+_MISSING = object()
+
+
 class StateManager:
     """Generic state manager for any LangGraph.
 
@@ -158,6 +209,8 @@ class StateManager:
     - Formatting state for API responses
     """
 
+    __slots__ = ("graph", "thread_id", "config", "checkpointer", "_state_cache")
+
     def __init__(self, graph: Any, thread_id: str):
         """Initialize state manager.
 
@@ -168,14 +221,81 @@ class StateManager:
         self.graph = graph
         self.thread_id = thread_id
         self.config = {"configurable": {"thread_id": thread_id}}
+        self.checkpointer = getattr(graph, "checkpointer", None)
+        self._state_cache: Any = _MISSING
 
     def get_current_state(self):
         """Get the current state from the graph.
 
+        The snapshot is fetched once and reused by later calls on this
+        instance until a write through the manager invalidates it.
+
         Returns:
             StateSnapshot with values, next, config, metadata
         """
-        return self.graph.get_state(self.config)
+        if self._state_cache is _MISSING:
+            self._state_cache = self.graph.get_state(self.config)
+        return self._state_cache
+
+    def invalidate(self):
+        """Drop the cached state snapshot (call after writing to the thread)."""
+        self._state_cache = _MISSING
+
+    def _fast_values(self) -> Dict[str, Any]:
+        """Get state values straight from the latest checkpoint.
+
+        ``graph.get_state`` also works out the next tasks, which the value
+        readers never use. Reading the checkpoint tuple skips that work.
+        Pending writes from an interrupted step are not applied here; use
+        ``get_current_state`` when they matter.
+
+        Returns:
+            Dictionary of state values (internal channels filtered out)
+        """
+        if self._state_cache is not _MISSING or not self.checkpointer:
+            return self.get_current_state().values
+        checkpoint_tuple = self.checkpointer.get_tuple(self.config)
+        if checkpoint_tuple is None:
+            return {}
+        channel_values = checkpoint_tuple.checkpoint["channel_values"]
+        return {
+            key: channel_values[key]
+            for key in self.graph.stream_channels_asis
+            if key in channel_values
+        }
+
+    def get_latest_checkpoint_id(self) -> Optional[str]:
+        """Get the id of the thread's newest checkpoint.
+
+        Checkpoints are append-only, so the id identifies the thread's
+        current contents (useful as a cache validator).
+
+        Returns:
+            Checkpoint id, or None if the thread has no checkpoints
+        """
+        if self._state_cache is not _MISSING or not self.checkpointer:
+            config = self.get_current_state().config
+        else:
+            checkpoint_tuple = self.checkpointer.get_tuple(self.config)
+            if checkpoint_tuple is None:
+                return None
+            config = checkpoint_tuple.config
+        return config.get("configurable", {}).get("checkpoint_id")
+
+    @contextmanager
+    def snapshot(self):
+        """Pin one state snapshot for the duration of a block.
+
+        Every read inside the block (values, display info, field info) uses
+        the same snapshot; on exit it is dropped so later reads are fresh.
+
+        Yields:
+            The pinned StateSnapshot
+        """
+        try:
+            yield self.get_current_state()
+        finally:
+            self.invalidate()
 
     def get_state_value(self, key: str) -> Any:
         """Get a specific value from the current state.
@@ -186,8 +306,7 @@ class StateManager:
         Returns:
             Value of the state field, or None if not found
         """
-        current_state = self.get_current_state()
-        return current_state.values.get(key)
+        return self._fast_values().get(key)
 
     def get_all_state_values(self) -> Dict[str, Any]:
         """Get all values from the current state.
@@ -195,8 +314,7 @@ class StateManager:
         Returns:
             Dictionary of all state values
         """
-        current_state = self.get_current_state()
-        return current_state.values
+        return self._fast_values()
 
     def get_display_info(self) -> Dict[str, Any]:
         """Get common display information from current state.
@@ -227,11 +345,15 @@ class StateManager:
             key: State field name
             value: New value
             as_node: Node to attribute the update to (optional)
-        """
-        current_state = self.get_current_state()
-        current_state.values[key] = value
 
-        self.graph.update_state(self.config, current_state.values, as_node=as_node)
+        Only the changed field is written and the other fields are left
+        alone. The value replaces the field even if it has a reducer (e.g.
+        an appending list), see ``_replacing``.
+        """
+        self.graph.update_state(
+            self.config, self._replacing({key: value}), as_node=as_node
+        )
+        self.invalidate()
 
     def update_state_values(
         self, updates: Dict[str, Any], as_node: Optional[str] = None
@@ -242,7 +364,34 @@ class StateManager:
             updates: Dictionary of field updates
             as_node: Node to attribute the update to (optional)
         """
-        self.graph.update_state(self.config, updates, as_node=as_node)
+        self.graph.update_state(self.config, self._replacing(updates), as_node=as_node)
+        self.invalidate()
+
+    def _replacing(self, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap values of reducer fields in ``Overwrite``.
+
+        An edit is the field's new value: without this, fields such as
+        ``content`` or ``messages`` (``operator.add``/``add_messages``) would
+        append the edited list to the old one instead of replacing it.
+        """
+        channels = getattr(self.graph, "channels", {})
+        return {
+            key: (
+                Overwrite(value)
+                if isinstance(channels.get(key), BinaryOperatorAggregate)
+                else value
+            )
+            for key, value in updates.items()
+        }
+
+    def _checkpoint_config(self, checkpoint_id: str) -> Dict[str, Any]:
+        """Config pointing at one checkpoint of this thread."""
+        return {
+            "configurable": {
+                **self.config["configurable"],
+                "checkpoint_id": checkpoint_id,
+            }
+        }
 
     def get_checkpoint_state(self, checkpoint_id: str):
         """Get state at a specific checkpoint.
@@ -253,13 +402,7 @@ class StateManager:
         Returns:
             StateSnapshot at the checkpoint
         """
-        config = {
-            "configurable": {
-                "thread_id": self.thread_id,
-                "checkpoint_id": checkpoint_id,
-            }
-        }
-        return self.graph.get_state(config)
+        return self.graph.get_state(self._checkpoint_config(checkpoint_id))
 
     def get_state_history(
         self, limit: Optional[int] = None, include_metadata: bool = True
@@ -273,12 +416,49 @@ class StateManager:
         Returns:
             List of formatted checkpoint information
         """
-        history = list(self.graph.get_state_history(self.config))
+        return list(self.iter_state_history(limit, include_metadata))
+
+    def get_state_history_columns(self, limit: Optional[int] = None) -> Dict[str, list]:
+        """Get state history as parallel columns instead of one dict per checkpoint.
+
+        Row i of every column describes the same checkpoint (newest first),
+        which keeps long histories compact for table-style clients.
+
+        Args:
+            limit: Maximum number of checkpoints to return
 
-        if limit:
-            history = history[:limit]
+        Returns:
+            Dict of column name to list of values
+        """
+        columns = {
+            "checkpoint_ids": [],
+            "next_nodes": [],
+            "parent_checkpoint_ids": [],
+            "messages_counts": [],
+        }
+        for info in self.iter_state_history(limit, include_metadata=False):
+            columns["checkpoint_ids"].append(info["checkpoint_id"])
+            columns["next_nodes"].append(info["next"])
+            columns["parent_checkpoint_ids"].append(info["parent_checkpoint_id"])
+            columns["messages_counts"].append(info.get("messages_count"))
+        return columns
+
+    def iter_state_history(
+        self, limit: Optional[int] = None, include_metadata: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield formatted checkpoints one at a time, newest first.
+
+        Args:
+            limit: Maximum number of checkpoints to yield
+            include_metadata: Whether to include metadata in each entry
+
+        Yields:
+            Formatted checkpoint information
+        """
+        # Pass the limit down to the checkpointer (SQL LIMIT for Postgres) and
+        # consume the iterator lazily instead of loading every snapshot
+        history = self.graph.get_state_history(self.config, limit=limit or None)
 
-        formatted_history = []
         for i, state in enumerate(history):
             checkpoint_info = {
                 "index": i,
@@ -300,16 +480,20 @@ class StateManager:
             if "messages" in state.values:
                 checkpoint_info["messages_count"] = len(state.values["messages"])
 
-            formatted_history.append(checkpoint_info)
+            yield checkpoint_info
 
-        return formatted_history
-
-    def get_state_fields_info(self) -> Dict[str, Any]:
+    def get_state_fields_info(
+        self, message_tail: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Get detailed information about all state fields.
 
         This provides a generic way to discover and display state structure,
         making the API work with any LangGraph without hardcoding.
 
+        Args:
+            message_tail: Only serialize the last N messages (earlier ones are
+                summarized by an "_elided" entry); None serializes all of them
+
         Returns:
             Dict with field information including types, editability, descriptions
         """
@@ -322,10 +506,21 @@ class StateManager:
 
         # Dynamically introspect state fields
         for key, value in current_state.values.items():
+            is_messages = (
+                key == "messages"
+                and isinstance(value, list)
+                and value
+                and isinstance(value[0], BaseMessage)
+            )
             field_info = {
-                "type": self._get_type_name(value),
+                "type": "list[Message]" if is_messages else self._get_type_name(value),
                 "editable": True,  # Most fields are editable
-                "value": self._serialize_value(value),
+                # Special handling for messages (serialized once, optionally tail only)
+                "value": (
+                    self._serialize_messages(value, tail=message_tail)
+                    if is_messages
+                    else self._serialize_value(value)
+                ),
                 "description": FIELD_DESCRIPTIONS.get(key, f"State field: {key}"),
             }
 
@@ -333,10 +528,6 @@ class StateManager:
             if isinstance(value, list):
                 field_info["count"] = len(value)
 
-                # Special handling for messages
-                if key == "messages" and value and isinstance(value[0], BaseMessage):
-                    field_info["value"] = self._serialize_messages(value)
-
             elif isinstance(value, dict):
                 field_info["keys"] = list(value.keys())
 
@@ -397,15 +588,13 @@ class StateManager:
         Returns:
             Dict of prompt names to their current values
         """
-        current_state = self.get_current_state()
+        values = self._fast_values()
         prompts = {}
 
         # Get all default prompts
         for prompt_name in DEFAULT_PROMPTS.keys():
             # Check if it's in state, otherwise use default
-            prompts[prompt_name] = current_state.values.get(
-                prompt_name, DEFAULT_PROMPTS[prompt_name]
-            )
+            prompts[prompt_name] = values.get(prompt_name, DEFAULT_PROMPTS[prompt_name])
 
         return prompts
 
@@ -417,11 +606,11 @@ class StateManager:
         Args:
             as_node: Node to attribute the initialization to
         """
-        current_state = self.get_current_state()
+        values = self._fast_values()
         updates = {}
 
         for prompt_name, default_value in DEFAULT_PROMPTS.items():
-            if prompt_name not in current_state.values:
+            if prompt_name not in values:
                 updates[prompt_name] = default_value
 
         if updates:
@@ -440,6 +629,8 @@ class StateManager:
 
     def _serialize_value(self, value: Any) -> Any:
         """Serialize value for JSON response."""
+        if type(value) in _JSON_SCALAR_TYPES:
+            return value
         if isinstance(value, list):
             if value and isinstance(value[0], BaseMessage):
                 return self._serialize_messages(value)
@@ -451,30 +642,48 @@ class StateManager:
         else:
             return str(value)
 
-    def _serialize_messages(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
-        """Serialize LangChain messages for API response."""
+    def _serialize_messages(
+        self, messages: List[BaseMessage], tail: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Serialize LangChain messages for API response.
+
+        Args:
+            messages: Messages to serialize
+            tail: Only serialize the last N messages, prefixed by an
+                {"type": "_elided", "count": n} entry for the skipped ones
+        """
         serialized = []
+        if tail is not None and len(messages) > tail:
+            serialized.append({"type": "_elided", "count": len(messages) - tail})
+            messages = messages[-tail:] if tail else []
         for msg in messages:
             serialized.append(self._serialize_message(msg))
         return serialized
 
     def _serialize_message(self, msg: BaseMessage) -> Dict[str, Any]:
         """Serialize a single message."""
-        msg_dict = {
-            "type": type(msg).__name__,
-            "content": msg.content if hasattr(msg, "content") else str(msg),
-        }
+        try:
+            content = msg.content
+        except AttributeError:
+            content = str(msg)
+        msg_dict = {"type": type(msg).__name__, "content": content}
 
         # Add tool_calls if present
-        if hasattr(msg, "tool_calls") and msg.tool_calls:
-            msg_dict["tool_calls"] = msg.tool_calls
+        if tool_calls := getattr(msg, "tool_calls", None):
+            msg_dict["tool_calls"] = tool_calls
 
         # Add tool_call_id if present
-        if hasattr(msg, "tool_call_id") and msg.tool_call_id:
-            msg_dict["tool_call_id"] = msg.tool_call_id
+        if tool_call_id := getattr(msg, "tool_call_id", None):
+            msg_dict["tool_call_id"] = tool_call_id
 
         return msg_dict
 
+    def serialize_message_bytes(self, msg: BaseMessage) -> bytes:
+        """Serialize a single message straight to JSON bytes (orjson)."""
+        return orjson.dumps(
+            self._serialize_message(msg), option=orjson.OPT_NON_STR_KEYS
+        )
+
     def deserialize_messages(
         self, messages_data: List[Dict[str, Any]]
     ) -> List[BaseMessage]:
@@ -497,31 +706,10 @@ class StateManager:
             if not isinstance(msg, dict):
                 continue
 
-            msg_type = msg.get("type", "HumanMessage")
-            content = msg.get("content", "")
-
-            if msg_type in ("HumanMessage", "human"):
-                converted_messages.append(HumanMessage(content=content))
-
-            elif msg_type in ("AIMessage", "ai"):
-                # Handle tool calls if present
-                tool_calls = msg.get("tool_calls", [])
-                if tool_calls:
-                    converted_messages.append(
-                        AIMessage(content=content, tool_calls=tool_calls)
-                    )
-                else:
-                    converted_messages.append(AIMessage(content=content))
-
-            elif msg_type in ("SystemMessage", "system"):
-                converted_messages.append(SystemMessage(content=content))
-
-            elif msg_type in ("ToolMessage", "tool"):
-                # ToolMessage requires tool_call_id
-                tool_call_id = msg.get("tool_call_id", msg.get("id", ""))
-                converted_messages.append(
-                    ToolMessage(content=content, tool_call_id=tool_call_id)
-                )
+            # Unknown types are skipped
+            build = _MESSAGE_BUILDERS.get(msg.get("type", "HumanMessage"))
+            if build:
+                converted_messages.append(build(msg))
 
         return converted_messages
 
@@ -537,51 +725,50 @@ class StateManager:
         Returns:
             Result of graph invocation
         """
-        config = {
-            "configurable": {
-                "thread_id": self.thread_id,
-                "checkpoint_id": checkpoint_id,
-            }
-        }
-
         # Resume from checkpoint
         input_data = None if new_input is None else new_input
-        result = self.graph.invoke(input_data, config)
+        result = self.graph.invoke(input_data, self._checkpoint_config(checkpoint_id))
+        self.invalidate()
 
         return result
 
-    def get_snapshots_summary(self, truncate_length: int = 80) -> str:
-        """Get formatted summary of all state snapshots.
+    def get_snapshots_summary(
+        self, truncate_length: int = 80, limit: Optional[int] = None
+    ) -> str:
+        """Get formatted summary of state snapshots, newest first.
 
         Args:
             truncate_length: Maximum length for string values
+            limit: Maximum number of snapshots to include (None for all)
 
         Returns:
             Formatted string summary
         """
-        summaries = []
-
-        for state in self.graph.get_state_history(self.config):
-            summaries.append(self._format_snapshot(state, truncate_length))
+        out = io.StringIO()
+        out.write("\n\n" + "=" * 80)
 
-        return "\n\n" + "=" * 80 + "\n\n".join(summaries)
+        history = self.graph.get_state_history(self.config, limit=limit or None)
+        for i, state in enumerate(history):
+            if i:
+                out.write("\n\n")
+            self._write_snapshot(out, state, truncate_length)
 
-    def _format_snapshot(self, state, truncate_length: int = 80) -> str:
-        """Format a single snapshot for display."""
-        lines = []
+        return out.getvalue()
 
+    def _write_snapshot(self, out: io.StringIO, state, truncate_length: int) -> None:
+        """Write a single formatted snapshot to a text buffer."""
         # Header
         checkpoint_id = state.config.get("configurable", {}).get(
             "checkpoint_id", "unknown"
         )
-        lines.append(f"Checkpoint: {checkpoint_id}")
-        lines.append(f"Next: {state.next if state.next else 'END'}")
+        out.write(f"Checkpoint: {checkpoint_id}")
+        out.write(f"\nNext: {state.next if state.next else 'END'}")
 
         # State values (truncated)
-        lines.append("\nState Values:")
+        out.write("\n\nState Values:")
         for key, value in state.values.items():
             if isinstance(value, str) and len(value) > truncate_length:
-                display_value = value[:truncate_length] + "..."
+                display_value = f"{value[:truncate_length]}..."
             elif isinstance(value, list):
                 if key == "messages":
                     display_value = f"[{len(value)} messages]"
@@ -592,16 +779,14 @@ class StateManager:
             else:
                 display_value = str(value)
 
-            lines.append(f"  {key}: {display_value}")
+            out.write(f"\n  {key}: {display_value}")
 
         # Metadata (excluding writes for brevity)
         if state.metadata:
-            lines.append("\nMetadata:")
+            out.write("\n\nMetadata:")
             for key, value in state.metadata.items():
                 if key != "writes":
-                    lines.append(f"  {key}: {value}")
-
-        return "\n".join(lines)
+                    out.write(f"\n  {key}: {value}")
 
 
 class GraphRunner:
@@ -610,6 +795,8 @@ class GraphRunner:
     Handles thread lifecycle, execution flow, and integrates with StateManager.
     """
 
+    __slots__ = ("graph", "max_iterations")
+
     def __init__(self, graph: Any, max_iterations: int = 10):
         """Initialize graph runner.
 
@@ -631,30 +818,99 @@ class GraphRunner:
         """
         return StateManager(self.graph, thread_id)
 
-    def execute_with_streaming(self, thread_id: str, input_data: Dict[str, Any]):
+    def execute_with_streaming(
+        self,
+        thread_id: str,
+        input_data: Dict[str, Any],
+        as_bytes: bool = False,
+        stream_tokens: bool = False,
+    ):
         """Execute graph with streaming events.
 
         Args:
             thread_id: Thread identifier
             input_data: Input for the graph
+            as_bytes: Yield events already JSON-encoded (orjson bytes), ready
+                to be written to a StreamingResponse
+            stream_tokens: Also yield {"event": "token"} events while the LLM
+                is generating, so clients see text at time-to-first-token.
+                Replies that start with "{" (JSON tool calls) are held back.
 
         Yields:
-            Event dictionaries for each node execution
+            Event dictionaries (or JSON bytes) for each node execution
         """
-        config = {"configurable": {"thread_id": thread_id}}
+        state_manager = self.create_state_manager(thread_id)
+        config = state_manager.config
+
+        def encode(event: Dict[str, Any]):
+            if not as_bytes:
+                return event
+            return orjson.dumps(
+                event,
+                default=state_manager._serialize_value,
+                option=orjson.OPT_NON_STR_KEYS,
+            )
 
-        for event in self.graph.stream(input_data, config):
-            for node_name, node_output in event.items():
-                yield {"event": "node", "node": node_name, "output": node_output}
+        # Set when the stream reports an interrupt; only then is the state
+        # fetched afterwards (for the next nodes), a completed run needs no read
+        interrupted = False
 
-        # Check final state
-        state_manager = self.create_state_manager(thread_id)
-        final_state = state_manager.get_current_state()
+        if not stream_tokens:
+            for event in self.graph.stream(input_data, config):
+                interrupted = interrupted or "__interrupt__" in event
+                for node_name, node_output in event.items():
+                    yield encode(
+                        {"event": "node", "node": node_name, "output": node_output}
+                    )
+        else:
+            # Per streamed message: True = forward tokens, False = tool-call
+            # JSON (suppress), missing = still only whitespace (buffered)
+            forward: Dict[str, bool] = {}
+            pending: Dict[str, str] = {}
+
+            for mode, chunk in self.graph.stream(
+                input_data, config, stream_mode=["updates", "messages"]
+            ):
+                if mode == "updates":
+                    interrupted = interrupted or "__interrupt__" in chunk
+                    for node_name, node_output in chunk.items():
+                        yield encode(
+                            {"event": "node", "node": node_name, "output": node_output}
+                        )
+                    continue
+
+                message_chunk, metadata = chunk
+                # Messages mode also emits finished node output (AIMessage,
+                # ToolMessage); only LLM chunks are tokens
+                if not isinstance(message_chunk, AIMessageChunk):
+                    continue
+                text = message_chunk.content
+                if not isinstance(text, str) or not text:
+                    continue
+
+                msg_id = message_chunk.id or ""
+                if msg_id not in forward:
+                    text = pending.pop(msg_id, "") + text
+                    if not text.strip():
+                        pending[msg_id] = text
+                        continue
+                    forward[msg_id] = not text.lstrip().startswith("{")
+
+                if forward[msg_id]:
+                    yield encode(
+                        {
+                            "event": "token",
+                            "node": metadata.get("langgraph_node"),
+                            "content": text,
+                        }
+                    )
+
+        final_state = state_manager.get_current_state() if interrupted else None
 
-        if final_state.next:
-            yield {"event": "interrupt", "next": final_state.next}
+        if final_state and final_state.next:
+            yield encode({"event": "interrupt", "next": final_state.next})
         else:
-            yield {"event": "complete"}
+            yield encode({"event": "complete"})
 
     def execute_sync(
         self, thread_id: str, input_data: Dict[str, Any]
@@ -1,11 +1,43 @@
 """Tool definitions for the LangGraph playground agent."""
 
+import ast
+from functools import lru_cache
+from types import MappingProxyType
+
 from langchain_core.tools import tool
-from langchain_community.tools.tavily_search import TavilySearchResults
 
 
-# Create Tavily search tool
-search_tool = TavilySearchResults(max_results=2)
+@lru_cache(maxsize=1)
+def _get_search_tool():
+    """Create the Tavily tool on first use (langchain_community is slow to import)."""
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=2)
+
+
+@tool("tavily_search_results_json")
+def search_tool(query: str) -> list:
+    """A search engine optimized for comprehensive, accurate, and trusted results. Useful for when you need to answer questions about current events. Input should be a search query."""
+    return _get_search_tool().invoke({"query": query})
+
+
+# Daily cost per destination (accommodation + food + local transport)
+_BASE_COSTS = MappingProxyType({
+    "paris": 200,
+    "tokyo": 180,
+    "bali": 80,
+    "new york": 250,
+    "london": 220,
+})
+_DEFAULT_COST = 150
+
+
+@lru_cache(maxsize=256)
+def _budget_estimate(destination: str, days: int) -> str:
+    cost_per_day = _BASE_COSTS.get(destination.lower(), _DEFAULT_COST)
+    total = cost_per_day * days
+
+    return f"Estimated budget for {destination} for {days} days: ${total} (${cost_per_day}/day for accommodation + food + local transport)"
 
 
 @tool
@@ -16,19 +48,67 @@ def get_travel_budget(destination: str, days: int) -> str:
         destination: The city or country to visit
         days: Number of days for the trip
     """
-    base_costs = {
-        "paris": 200,
-        "tokyo": 180,
-        "bali": 80,
-        "new york": 250,
-        "london": 220,
-        "default": 150
-    }
-    
-    cost_per_day = base_costs.get(destination.lower(), base_costs["default"])
-    total = cost_per_day * days
-    
-    return f"Estimated budget for {destination} for {days} days: ${total} (${cost_per_day}/day for accommodation + food + local transport)"
+    return _budget_estimate(destination, days)
+
+
+# AST node types the calculator accepts: numbers and arithmetic operators only
+_ALLOWED_EXPRESSION_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+)
+
+
+# Largest literal exponent the calculator will raise a number to
+_MAX_EXPONENT = 100
+
+
+# Deletes every allowed calculator character; anything left over is invalid
+_ALLOWED_EXPRESSION_CHARS = str.maketrans("", "", "0123456789+-*/(). ")
+
+
+@lru_cache(maxsize=512)
+def _compile_expression(expression: str):
+    """Parse, validate and compile an arithmetic expression once."""
+    tree = ast.parse(expression, mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_EXPRESSION_NODES):
+            raise ValueError(
+                f"Unsupported expression element: {type(node).__name__}"
+            )
+        if isinstance(node, ast.Constant) and (
+            isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+        ):
+            raise ValueError("Only numeric constants are allowed")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            _check_power(node)
+    return compile(tree, "<calculator>", "eval")
+
+
+def _check_power(node: ast.BinOp) -> None:
+    """Reject powers that could take unbounded time or memory to compute."""
+    exponent = node.right
+    if isinstance(exponent, ast.UnaryOp) and isinstance(
+        exponent.op, (ast.UAdd, ast.USub)
+    ):
+        exponent = exponent.operand
+    if not isinstance(exponent, ast.Constant) or abs(exponent.value) > _MAX_EXPONENT:
+        raise ValueError(f"Exponents must be numbers up to {_MAX_EXPONENT}")
+    if any(
+        isinstance(child, ast.BinOp) and isinstance(child.op, ast.Pow)
+        for child in ast.walk(node.left)
+    ):
+        raise ValueError("Nested exponents are not allowed")
 
 
 @tool
@@ -40,16 +120,15 @@ def calculator(expression: str) -> str:
     """
     try:
         # Safe evaluation - only allow numbers and basic operators
-        allowed_chars = set("0123456789+-*/(). ")
-        if not all(c in allowed_chars for c in expression):
+        if expression.translate(_ALLOWED_EXPRESSION_CHARS):
             return "Error: Invalid characters in expression"
         
-        result = eval(expression, {"__builtins__": {}}, {})
+        result = eval(_compile_expression(expression), {"__builtins__": {}}, {})
         return f"Result: {result}"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
 # Export all tools
-tools = [search_tool, get_travel_budget, calculator]
-tools_by_name = {t.name: t for t in tools}
+tools = (search_tool, get_travel_budget, calculator)
+tools_by_name = MappingProxyType({t.name: t for t in tools})
@@ -12,23 +12,125 @@ to experiment with how different prompts affect agent behavior!
 """
 
 import os
+import re
+import json
 import sqlite3
+import hashlib
 import logging
-from typing import TypedDict, Annotated, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TypedDict, Annotated, Any, Dict, List, Optional, Tuple
 import operator
 
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
 from langchain_aws import ChatBedrock
-from langchain_core.pydantic_v1 import BaseModel
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.postgres import PostgresSaver
-from tavily import TavilyClient
 import boto3
+import httpx
+from botocore.config import Config
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
+# Bedrock models: the main model writes and reviews itineraries; the fast
+# model handles short outputs (outline, search-query lists)
+DEFAULT_MODEL_ID = os.getenv("AWS_BEDROCK_MODEL", "amazon.nova-lite-v1:0")
+FAST_MODEL_ID = os.getenv("AWS_BEDROCK_FAST_MODEL", "amazon.nova-micro-v1:0")
+
+# ChatBedrock instances kept for reuse. Temperature and max_tokens come from
+# editable state, so the instance caches are bounded LRUs
+LLM_INSTANCE_CACHE_SIZE = 32
+
+# Max number of cached LLM responses. Off by default: a cache hit replays an
+# earlier output, which hides the effect of re-running a step. Only
+# temperature-0 requests are cached even when enabled
+LLM_RESPONSE_CACHE_SIZE = int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "0"))
+
+# Compact, key-sorted encoder for cache keys, built once (json.dumps with
+# options constructs a new JSONEncoder on every call)
+_CACHE_KEY_ENCODER = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+)
+
+# Ask Bedrock to cache the prompt prefix (system prompt first) on models that
+# support prompt caching; system prompts are kept byte-stable so they can hit
+BEDROCK_PROMPT_CACHE = os.getenv("BEDROCK_PROMPT_CACHE", "true").lower() == "true"
+PROMPT_CACHE_MODELS = ("amazon.nova", "anthropic.claude")
+
+# Request Bedrock latency-optimized inference. Only some models/regions offer
+# it (e.g. Nova Pro, Claude 3.5 Haiku in us-east-2); turn off when unsupported
+# or when the optimized quota is exhausted
+BEDROCK_LATENCY_OPTIMIZED = (
+    os.getenv("BEDROCK_LATENCY_OPTIMIZED", "false").lower() == "true"
+)
+
+# Character budget for the research passed to the generator (~4 chars/token);
+# past it the oldest snippets are dropped
+MAX_RESEARCH_CHARS = int(os.getenv("MAX_RESEARCH_CHARS", "24000"))
+
+# Stop revising once a critique's word overlap (Jaccard) with the previous
+# critique reaches this: the advisor is repeating itself, another cycle won't
+# change the draft much
+CRITIQUE_CONVERGENCE = float(os.getenv("CRITIQUE_CONVERGENCE", "0.9"))
+
+# Tavily REST endpoint used by the research nodes
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+# Only each result's "content" snippet is used: ask for the cheap basic
+# search and no answer/raw page/images, so responses stay small
+_TAVILY_OPTIONS = {
+    "max_results": 2,
+    "search_depth": "basic",
+    "include_answer": False,
+    "include_raw_content": False,
+    "include_images": False,
+}
+
+# How long cached Tavily search results stay fresh (seconds)
+TAVILY_CACHE_TTL = int(os.getenv("TAVILY_CACHE_TTL", str(24 * 60 * 60)))
+
+# Max number of queries kept in the search cache (least recently used go first)
+TAVILY_CACHE_SIZE = int(os.getenv("TAVILY_CACHE_SIZE", "1024"))
+
+# Local research corpus: every Tavily result is stored in Postgres and
+# full-text searched before calling Tavily, so recurring destinations are
+# answered in-process. Rows older than RESEARCH_CORPUS_MAX_AGE_DAYS are ignored.
+RESEARCH_CORPUS_ENABLED = os.getenv("RESEARCH_CORPUS", "true").lower() == "true"
+RESEARCH_CORPUS_MAX_AGE_DAYS = int(os.getenv("RESEARCH_CORPUS_MAX_AGE_DAYS", "30"))
+
+_CORPUS_SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS research_corpus (
+    topic TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE UNIQUE INDEX IF NOT EXISTS research_corpus_content_idx
+    ON research_corpus (md5(content));
+CREATE INDEX IF NOT EXISTS research_corpus_tsv_idx
+    ON research_corpus USING GIN (tsv);
+"""
+
+_CORPUS_SEARCH_SQL = """
+SELECT content
+FROM research_corpus, plainto_tsquery('english', %s) AS q
+WHERE tsv @@ q AND fetched_at > now() - make_interval(days => %s)
+ORDER BY ts_rank(tsv, q) DESC
+LIMIT %s
+"""
+
+_CORPUS_INSERT_SQL = """
+INSERT INTO research_corpus (topic, content) VALUES (%s, %s)
+ON CONFLICT (md5(content)) DO UPDATE SET fetched_at = now()
+"""
+
+
 # Default prompts for each node - students can edit these!
 DEFAULT_PLANNER_PROMPT = """You are an expert travel planner tasked with creating a high-level outline for a trip.
 
@@ -90,8 +192,48 @@ Focus on finding:
 
 Return your queries as a list."""
 
+# Prebuilt system messages for the prompts that are sent unchanged, so runs
+# that keep the defaults reuse one message object instead of rebuilding it
+_DEFAULT_PLANNER_SYS = SystemMessage(content=DEFAULT_PLANNER_PROMPT)
+_DEFAULT_TRAVEL_PLAN_SYS = SystemMessage(content=DEFAULT_TRAVEL_PLAN_PROMPT)
+_DEFAULT_GENERATOR_SYS = SystemMessage(content=DEFAULT_GENERATOR_PROMPT)
+_DEFAULT_CRITIC_SYS = SystemMessage(content=DEFAULT_CRITIC_PROMPT)
+_DEFAULT_TRAVEL_CRITIQUE_SYS = SystemMessage(content=DEFAULT_TRAVEL_CRITIQUE_PROMPT)
+
+
+def _system_message(prompt: Optional[str], default: SystemMessage) -> SystemMessage:
+    """Return the prebuilt default message unless the prompt has been edited."""
+    if prompt is None or prompt == default.content:
+        return default
+    return SystemMessage(content=prompt)
+
 
-class Queries(BaseModel):
+def _research_context(snippets: List[str]) -> str:
+    """Join unique research snippets, keeping the newest within MAX_RESEARCH_CHARS.
+
+    Snippets stay in their original order; the most recent always fits, even
+    if it alone is over budget.
+    """
+    kept: List[str] = []
+    total = 0
+    for snippet in reversed(list(dict.fromkeys(snippets))):
+        total += len(snippet) + 2
+        if kept and total > MAX_RESEARCH_CHARS:
+            break
+        kept.append(snippet)
+    return "\n\n".join(reversed(kept))
+
+
+def _word_overlap(a: str, b: str) -> float:
+    """Jaccard similarity of the lowercase word sets of two texts."""
+    words_a = set(re.findall(r"\w+", a.lower()))
+    words_b = set(re.findall(r"\w+", b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class Queries(TypedDict):
     """Search queries model."""
 
     queries: List[str]
@@ -109,7 +251,8 @@ class TripState(TypedDict):
     plan: str  # The trip outline
     draft: str  # Current itinerary draft
     critique: str  # Feedback on the itinerary
-    content: List[str]  # Research content
+    critique_converged: bool  # Critique repeats the previous one (stop early)
+    content: Annotated[List[str], operator.add]  # Research content (appended)
     queries: List[str]  # Search queries used
     revision_number: int  # Current revision
     max_revisions: int  # Max allowed revisions
@@ -132,11 +275,22 @@ class TripState(TypedDict):
     count: Annotated[int, operator.add]
 
 
+def _llm_params(state: TripState, model_id: str) -> Tuple[Any, Any, str]:
+    """Model parameters from state, as the key of the LLM instance caches."""
+    return state.get("temperature", 0.7), state.get("max_tokens", 4096), model_id
+
+
 class TripPlannerGraph:
     """Trip Planner with editable node prompts."""
 
-    def __init__(self):
-        """Initialize the trip planner graph."""
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
+        """Initialize the trip planner graph.
+
+        Args:
+            checkpointer: Saver for both compiled graphs. Defaults to the
+                shared PostgreSQL saver; pass a MemorySaver for runs that
+                don't need persistence (CLI demos, tests).
+        """
         # Initialize Bedrock client
         AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
         AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -147,22 +301,274 @@ class TripPlannerGraph:
             region_name=AWS_REGION,
             aws_access_key_id=AWS_ACCESS_KEY_ID,
             aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            # One shared client for every ChatBedrock: enough pooled,
+            # kept-alive connections for concurrent runs, adaptive retries
+            # on throttling
+            config=Config(
+                max_pool_connections=64,
+                retries={"max_attempts": 3, "mode": "adaptive"},
+                tcp_keepalive=True,
+                connect_timeout=5,
+                read_timeout=60,
+            ),
+        )
+
+        # ChatBedrock instances keyed by (temperature, max_tokens, model_id)
+        self._llm_for = lru_cache(maxsize=LLM_INSTANCE_CACHE_SIZE)(self._build_llm)
+        # Structured-output (Queries) runnables, same keys; building one
+        # converts the schema to a tool (~50ms)
+        self._queries_llm_for = lru_cache(maxsize=LLM_INSTANCE_CACHE_SIZE)(
+            self._build_queries_llm
+        )
+
+        # LRU cache of LLM responses keyed by request hash
+        self._response_cache: "OrderedDict[str, AIMessage]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+
+        # Keep-alive HTTP client for Tavily: reuses TCP/TLS connections across
+        # searches instead of opening a new connection per query
+        self._http = httpx.Client(
+            headers={"Authorization": f"Bearer {os.environ['TAVILY_API_KEY']}"},
+            limits=httpx.Limits(max_keepalive_connections=20),
+            timeout=30.0,
+        )
+        # Search results keyed by normalized query: (fetched_at, contents)
+        self._search_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+
+        # Shared pool so the searches of one node run concurrently
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="tavily-search"
+        )
+
+        # One checkpointer (and connection pool) for every compiled graph
+        if checkpointer is None:
+            checkpointer = self._get_postgres_checkpointer()
+        self._checkpointer = checkpointer
+        # Interrupt before key nodes for HITL
+        self.graph = self._build_graph().compile(
+            checkpointer=self._checkpointer,
+            interrupt_before=["planner", "generate", "reflect"],
+        )
+        # Same compiled graph without interrupts for direct execution: a
+        # shallow copy shares the nodes and channels instead of recompiling
+        self.graph_no_interrupt = self.graph.copy(update={"interrupt_before_nodes": []})
+
+        # The research corpus lives in the checkpointer's Postgres database
+        self._corpus_enabled = (
+            RESEARCH_CORPUS_ENABLED
+            and isinstance(self._checkpointer, PostgresSaver)
+            and self._setup_corpus()
         )
 
-        self.tavily = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
-        self.graph = self._build_graph()
+    def close(self):
+        """Release the HTTP client and search worker threads."""
+        self._http.close()
+        self._search_pool.shutdown(wait=False)
 
-    def _get_llm(self, state: TripState):
-        """Get LLM with parameters from state."""
-        temperature = state.get("temperature", 0.7)
-        max_tokens = state.get("max_tokens", 4096)
+    def _get_llm(self, state: TripState, model_id: str = DEFAULT_MODEL_ID):
+        """Get LLM with parameters from state.
 
+        Instances are reused across node calls for the same parameters.
+
+        Args:
+            state: Current graph state (temperature, max_tokens)
+            model_id: Bedrock model to use (FAST_MODEL_ID for short outputs)
+        """
+        return self._llm_for(*_llm_params(state, model_id))
+
+    def _get_queries_llm(self, state: TripState, model_id: str = FAST_MODEL_ID):
+        """Get the structured-output (Queries) LLM with parameters from state."""
+        return self._queries_llm_for(*_llm_params(state, model_id))
+
+    def _build_llm(
+        self, temperature: float, max_tokens: int, model_id: str
+    ) -> ChatBedrock:
+        """Create a ChatBedrock on the shared client (cached by ``_llm_for``)."""
+        model_kwargs = {"temperature": temperature, "max_tokens": max_tokens}
+        if BEDROCK_LATENCY_OPTIMIZED:
+            model_kwargs["performance_config"] = {"latency": "optimized"}
         return ChatBedrock(
             client=self.bedrock_runtime,
-            model_id="amazon.nova-lite-v1:0",
-            model_kwargs={"temperature": temperature, "max_tokens": max_tokens},
+            model_id=model_id,
+            model_kwargs=model_kwargs,
         )
 
+    def _build_queries_llm(self, temperature: float, max_tokens: int, model_id: str):
+        """Wrap the matching ChatBedrock for Queries output (cached)."""
+        return self._llm_for(temperature, max_tokens, model_id).with_structured_output(
+            Queries
+        )
+
+    def _invoke_cached(self, llm: ChatBedrock, messages: List[BaseMessage]):
+        """Invoke the LLM, reusing the response of an identical earlier request.
+
+        Students often re-run the same trip with unchanged prompts while
+        tweaking one node, so when LLM_RESPONSE_CACHE_SIZE is set, identical
+        (model, parameters, messages) requests are answered from memory
+        instead of calling Bedrock again. Requests with temperature > 0 are
+        never cached: a re-run should sample a new output. Misses ask Bedrock
+        to cache the prompt prefix when the model supports it.
+        """
+        invoke_kwargs = {}
+        if BEDROCK_PROMPT_CACHE and any(m in llm.model_id for m in PROMPT_CACHE_MODELS):
+            invoke_kwargs["cache_control"] = {"type": "ephemeral"}
+
+        if LLM_RESPONSE_CACHE_SIZE <= 0 or llm.temperature:
+            return llm.invoke(messages, **invoke_kwargs)
+
+        key = hashlib.sha256(
+            _CACHE_KEY_ENCODER.encode(
+                [
+                    llm.model_id,
+                    llm.temperature,
+                    llm.max_tokens,
+                    llm.model_kwargs,
+                    [(m.type, m.content) for m in messages],
+                ]
+            ).encode()
+        ).hexdigest()
+
+        with self._response_cache_lock:
+            response = self._response_cache.get(key)
+            if response is not None:
+                self._response_cache.move_to_end(key)
+                logger.info("♻️ LLM response cache hit")
+                return response
+
+        response = llm.invoke(messages, **invoke_kwargs)
+
+        with self._response_cache_lock:
+            self._response_cache[key] = response
+            if len(self._response_cache) > LLM_RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+
+        return response
+
+    def _search(self, query: str) -> List[str]:
+        """Run a single Tavily search and return the result contents.
+
+        Results are cached per normalized query for TAVILY_CACHE_TTL seconds
+        (at most TAVILY_CACHE_SIZE queries, least recently used evicted first),
+        so repeated queries (re-runs, revisions, other students) skip the API.
+        Otherwise the local research corpus is tried first; Tavily is only
+        called when it has no match, and its results are added to the corpus.
+        """
+        key = query.lower().strip()
+        with self._search_cache_lock:
+            cached = self._search_cache.get(key)
+            if cached is not None:
+                self._search_cache.move_to_end(key)
+        if cached is not None and time.monotonic() - cached[0] < TAVILY_CACHE_TTL:
+            logger.info(f"♻️ Search cache hit: '{query}'")
+            return cached[1]
+
+        contents = self._corpus_search(query, 2) if self._corpus_enabled else []
+        if contents:
+            logger.info(f"📚 Research corpus hit: '{query}'")
+        else:
+            response = self._http.post(
+                TAVILY_SEARCH_URL, json={"query": query, **_TAVILY_OPTIONS}
+            )
+            response.raise_for_status()
+            contents = [
+                result["content"] for result in response.json().get("results", [])
+            ]
+            if self._corpus_enabled:
+                self._corpus_add(key, contents)
+
+        with self._search_cache_lock:
+            self._search_cache[key] = (time.monotonic(), contents)
+            self._search_cache.move_to_end(key)
+            if len(self._search_cache) > TAVILY_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return contents
+
+    def _setup_corpus(self) -> bool:
+        """Create the research corpus table; returns False if unavailable."""
+        try:
+            with self._checkpointer.conn.connection() as conn:
+                conn.execute(_CORPUS_SETUP_SQL)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Research corpus disabled: {e}")
+            return False
+
+    def _corpus_search(self, query: str, limit: int) -> List[str]:
+        """Full-text search the research corpus (empty list on any error)."""
+        try:
+            with self._checkpointer.conn.connection() as conn:
+                rows = conn.execute(
+                    _CORPUS_SEARCH_SQL, (query, RESEARCH_CORPUS_MAX_AGE_DAYS, limit)
+                ).fetchall()
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Research corpus search error for '{query}': {e}")
+            return []
+
+    def _corpus_add(self, topic: str, contents: List[str]):
+        """Store search results in the research corpus."""
+        if not contents:
+            return
+        try:
+            with self._checkpointer.conn.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        _CORPUS_INSERT_SQL, [(topic, content) for content in contents]
+                    )
+        except Exception as e:
+            logger.error(f"❌ Research corpus insert error for '{topic}': {e}")
+
+    def _generate_and_search(
+        self, queries_llm, messages: List[BaseMessage], limit: int, node_name: str
+    ) -> Tuple[List[str], List[List[str]]]:
+        """Generate search queries and run them concurrently.
+
+        The structured output is streamed so searching starts before the
+        model has finished the list: a query is final once the next one
+        appears (or the stream ends), and is submitted right away. Wall time
+        is roughly the LLM call plus the slowest remaining search. Models
+        that don't stream tool calls just yield the whole list at the end.
+
+        Args:
+            queries_llm: Structured-output model that writes the queries
+            messages: Prompt for the query list
+            limit: Max number of queries to search
+            node_name: Calling node, used for logging
+
+        Returns:
+            All generated queries, and one list of result contents for each
+            of the first ``limit`` queries (empty if that search failed)
+        """
+        queries: List[str] = []
+        futures = []
+
+        def submit(query: str):
+            logger.info(f"🌐 [{node_name}] Searching: '{query}'")
+            futures.append(self._search_pool.submit(self._search, query))
+
+        for partial in queries_llm.stream(messages):
+            if partial is None:
+                continue
+            queries = list(partial.get("queries") or [])
+            # Every query except the last one is complete
+            while len(futures) < min(len(queries) - 1, limit):
+                submit(queries[len(futures)])
+
+        for query in queries[len(futures) : limit]:
+            submit(query)
+
+        results = []
+        for query, future in zip(queries, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"❌ [{node_name}] Search error for '{query}': {e}")
+                print(f"Search error for '{query}': {e}")
+                results.append([])
+
+        return queries, results
+
     def plan_node(self, state: TripState):
         """Planning node - creates trip outline.
 
@@ -173,12 +579,14 @@ class TripPlannerGraph:
         )
 
         # Get prompt from state (with fallback to default)
-        prompt = state.get("planner_prompt", DEFAULT_PLANNER_PROMPT)
+        system_message = _system_message(
+            state.get("planner_prompt"), _DEFAULT_PLANNER_SYS
+        )
 
-        messages = [SystemMessage(content=prompt), HumanMessage(content=state["task"])]
+        messages = [system_message, HumanMessage(content=state["task"])]
 
-        llm = self._get_llm(state)
-        response = llm.invoke(messages)
+        llm = self._get_llm(state, model_id=FAST_MODEL_ID)
+        response = self._invoke_cached(llm, messages)
 
         logger.info(
             f"✅ [plan_node] Trip outline created: {len(response.content)} chars"
@@ -200,28 +608,22 @@ class TripPlannerGraph:
             f"🔍 [travel_plan_node] Researching destination: '{state['task'][:50]}...'"
         )
 
-        prompt = state.get("travel_plan_prompt", DEFAULT_TRAVEL_PLAN_PROMPT)
-
-        llm = self._get_llm(state)
-        queries_obj = llm.with_structured_output(Queries).invoke(
-            [SystemMessage(content=prompt), HumanMessage(content=state["task"])]
+        system_message = _system_message(
+            state.get("travel_plan_prompt"), _DEFAULT_TRAVEL_PLAN_SYS
         )
 
-        logger.info(
-            f"🔍 [travel_plan_node] Generated {len(queries_obj.queries)} search queries"
+        queries, search_results = self._generate_and_search(
+            self._get_queries_llm(state),
+            [system_message, HumanMessage(content=state["task"])],
+            3,
+            "travel_plan_node",
         )
 
-        # Execute searches
+        logger.info(f"🔍 [travel_plan_node] Generated {len(queries)} search queries")
+
         content = []
-        for query in queries_obj.queries[:3]:
-            try:
-                logger.info(f"🌐 [travel_plan_node] Searching: '{query}'")
-                response = self.tavily.search(query=query, max_results=2)
-                for result in response.get("results", []):
-                    content.append(result["content"])
-            except Exception as e:
-                logger.error(f"❌ [travel_plan_node] Search error for '{query}': {e}")
-                print(f"Search error for '{query}': {e}")
+        for results in search_results:
+            content.extend(results)
 
         logger.info(
             f"✅ [travel_plan_node] Research complete: {len(content)} sources found"
@@ -231,14 +633,14 @@ class TripPlannerGraph:
         messages_to_add = []
 
         # Add status message showing what we're searching for
-        queries_text = "\n".join([f"- {q}" for q in queries_obj.queries[:3]])
+        queries_text = "\n".join([f"- {q}" for q in queries[:3]])
         status_msg = AIMessage(
             content=f"🔍 **Step 2: Research Complete**\n\nI searched for:\n{queries_text}\n\nFound {len(content)} relevant sources."
         )
         messages_to_add.append(status_msg)
 
         # IMPORTANT: Add individual tool call messages for each search (for demo visibility)
-        for i, query in enumerate(queries_obj.queries[:3], 1):
+        for i, query in enumerate(queries[:3], 1):
             # Create a ToolMessage to show the search in the UI
             from langchain_core.messages import ToolMessage
 
@@ -251,7 +653,7 @@ class TripPlannerGraph:
 
         return {
             "content": content,
-            "queries": queries_obj.queries,
+            "queries": queries,
             "count": 1,
             "messages": messages_to_add,
         }
@@ -264,21 +666,24 @@ class TripPlannerGraph:
         revision_num = state.get("revision_number", 0) + 1
         logger.info(f"✍️ [generation_node] Generating draft (revision {revision_num})")
 
-        prompt = state.get("generator_prompt", DEFAULT_GENERATOR_PROMPT)
+        system_message = _system_message(
+            state.get("generator_prompt"), _DEFAULT_GENERATOR_SYS
+        )
 
-        # Build context with research
-        content = "\n\n".join(state.get("content", []))
-        context = f"{prompt}\n\nResearch content:\n{content}"
+        # Research goes last in the user turn so the system prompt (and the
+        # task/outline after it) stay byte-identical across revisions and hit
+        # the prompt cache; duplicate and over-budget snippets are dropped
+        content = _research_context(state.get("content", []))
 
         messages = [
-            SystemMessage(content=context),
+            system_message,
             HumanMessage(
-                content=f"Destination/Trip: {state['task']}\n\nTrip Outline:\n{state['plan']}"
+                content=f"Destination/Trip: {state['task']}\n\nTrip Outline:\n{state['plan']}\n\nResearch content:\n{content}"
             ),
         ]
 
         llm = self._get_llm(state)
-        response = llm.invoke(messages)
+        response = self._invoke_cached(llm, messages)
 
         logger.info(
             f"✅ [generation_node] Itinerary generated: {len(response.content)} chars"
@@ -306,15 +711,17 @@ class TripPlannerGraph:
             f"🤔 [reflection_node] Critiquing itinerary (revision {state.get('revision_number', 1)})"
         )
 
-        prompt = state.get("critic_prompt", DEFAULT_CRITIC_PROMPT)
+        system_message = _system_message(
+            state.get("critic_prompt"), _DEFAULT_CRITIC_SYS
+        )
 
         messages = [
-            SystemMessage(content=prompt),
+            system_message,
             HumanMessage(content=f"Trip itinerary to review:\n\n{state['draft']}"),
         ]
 
         llm = self._get_llm(state)
-        response = llm.invoke(messages)
+        response = self._invoke_cached(llm, messages)
 
         logger.info(
             f"✅ [reflection_node] Critique complete: {len(response.content)} chars"
@@ -325,7 +732,19 @@ class TripPlannerGraph:
             content=f"🤔 **Step 4: Travel Advisor Review**\n\nHere's my feedback on your itinerary:\n\n{response.content}"
         )
 
-        return {"critique": response.content, "count": 1, "messages": [status_msg]}
+        previous = state.get("critique")
+        converged = bool(previous) and (
+            _word_overlap(previous, response.content) >= CRITIQUE_CONVERGENCE
+        )
+        if converged:
+            logger.info("🛑 [reflection_node] Critique repeats the previous one")
+
+        return {
+            "critique": response.content,
+            "critique_converged": converged,
+            "count": 1,
+            "messages": [status_msg],
+        }
 
     def travel_critique_node(self, state: TripState):
         """Travel research critique node - finds info to address feedback.
@@ -334,51 +753,49 @@ class TripPlannerGraph:
         """
         logger.info(f"🔍 [travel_critique_node] Researching to address critique")
 
-        prompt = state.get("travel_critique_prompt", DEFAULT_TRAVEL_CRITIQUE_PROMPT)
+        system_message = _system_message(
+            state.get("travel_critique_prompt"), _DEFAULT_TRAVEL_CRITIQUE_SYS
+        )
 
-        llm = self._get_llm(state)
-        queries_obj = llm.with_structured_output(Queries).invoke(
-            [SystemMessage(content=prompt), HumanMessage(content=state["critique"])]
+        queries, search_results = self._generate_and_search(
+            self._get_queries_llm(state),
+            [system_message, HumanMessage(content=state["critique"])],
+            2,
+            "travel_critique_node",
         )
 
         logger.info(
-            f"🔍 [travel_critique_node] Generated {len(queries_obj.queries)} follow-up queries"
+            f"🔍 [travel_critique_node] Generated {len(queries)} follow-up queries"
         )
 
-        # Execute searches
-        content = state.get("content", []).copy()
-        new_sources = 0
-        for query in queries_obj.queries[:2]:
-            try:
-                logger.info(f"🌐 [travel_critique_node] Searching: '{query}'")
-                response = self.tavily.search(query=query, max_results=2)
-                for result in response.get("results", []):
-                    content.append(result["content"])
-                    new_sources += 1
-            except Exception as e:
-                logger.error(
-                    f"❌ [travel_critique_node] Search error for '{query}': {e}"
-                )
-                print(f"Search error for '{query}': {e}")
+        # Keep only sources we don't have; the content reducer appends them
+        # to the existing research
+        seen = set(state.get("content", []))
+        new_content = []
+        for results in search_results:
+            for result in results:
+                if result not in seen:
+                    seen.add(result)
+                    new_content.append(result)
 
         logger.info(
-            f"✅ [travel_critique_node] Additional research complete: {new_sources} new sources"
+            f"✅ [travel_critique_node] Additional research complete: {len(new_content)} new sources"
         )
 
         # Create messages showing tool calls for UI visibility
         messages_to_add = []
 
         # Add status message
-        queries_text = "\n".join([f"- {q}" for q in queries_obj.queries[:2]])
+        queries_text = "\n".join([f"- {q}" for q in queries[:2]])
         status_msg = AIMessage(
-            content=f"🔍 **Additional Research**\n\nTo address the feedback, I searched for:\n{queries_text}\n\nFound {new_sources} additional sources. Now revising..."
+            content=f"🔍 **Additional Research**\n\nTo address the feedback, I searched for:\n{queries_text}\n\nFound {len(new_content)} additional sources. Now revising..."
         )
         messages_to_add.append(status_msg)
 
         # Add individual tool call messages for each follow-up search (for demo visibility)
         from langchain_core.messages import ToolMessage
 
-        for i, query in enumerate(queries_obj.queries[:2], 1):
+        for i, query in enumerate(queries[:2], 1):
             tool_msg = ToolMessage(
                 content=f"🌐 **Tavily Follow-up Search #{i}**\n\n**Query:** `{query}`\n\n**Purpose:** Addressing critique feedback\n**Status:** ✅ Search completed",
                 tool_call_id=f"tavily_critique_{i}",
@@ -386,16 +803,22 @@ class TripPlannerGraph:
             )
             messages_to_add.append(tool_msg)
 
-        return {"content": content, "count": 1, "messages": messages_to_add}
+        return {"content": new_content, "count": 1, "messages": messages_to_add}
 
     def should_continue(self, state):
-        """Decide whether to continue revising or end."""
+        """Decide whether to continue revising or end.
+
+        Ends at max_revisions, or right after the draft that applied a
+        critique which barely differed from the one before it.
+        """
         if state["revision_number"] >= state["max_revisions"]:
             return END
+        if state.get("critique_converged"):
+            return END
         return "reflect"
 
     def _build_graph(self):
-        """Build the trip planner graph."""
+        """Build the (uncompiled) trip planner graph."""
         builder = StateGraph(TripState)
 
         # Add nodes
@@ -405,40 +828,29 @@ class TripPlannerGraph:
         builder.add_node("reflect", self.reflection_node)
         builder.add_node("travel_critique", self.travel_critique_node)
 
-        # Set entry point
-        builder.set_entry_point("planner")
+        # Fan out: travel_plan only needs the task, not the outline, so it
+        # runs in parallel with the planner and both join at generate
+        builder.add_edge(START, "planner")
+        builder.add_edge(START, "travel_plan")
+        builder.add_edge(["planner", "travel_plan"], "generate")
 
         # Add edges
         builder.add_conditional_edges(
             "generate", self.should_continue, {END: END, "reflect": "reflect"}
         )
-        builder.add_edge("planner", "travel_plan")
-        builder.add_edge("travel_plan", "generate")
         builder.add_edge("reflect", "travel_critique")
         builder.add_edge("travel_critique", "generate")
 
-        # Compile with PostgreSQL checkpointer
-        checkpointer = self._get_postgres_checkpointer()
-
-        # Interrupt before key nodes for HITL
-        return builder.compile(
-            checkpointer=checkpointer,
-            interrupt_before=["planner", "generate", "reflect"],
-        )
+        return builder
 
     def _get_postgres_checkpointer(self):
-        """Create PostgreSQL checkpointer from environment variables."""
-        from psycopg_pool import ConnectionPool
-
-        # Get PostgreSQL connection details from environment
-        db_uri = os.getenv(
-            "POSTGRES_URI",
-            f"postgresql://{os.getenv('POSTGRES_USER', 'langgraph')}:"
-            f"{os.getenv('POSTGRES_PASSWORD', 'langgraph_password_change_in_production')}@"
-            f"{os.getenv('POSTGRES_HOST', 'localhost')}:"
-            f"{os.getenv('POSTGRES_PORT', '5432')}/"
-            f"{os.getenv('POSTGRES_DB', 'langgraph')}",
-        )
+        """Get the shared PostgreSQL checkpointer.
+
+        graph.py owns the connection pool and runs setup() once per process;
+        reusing its saver avoids a second pool and repeated DDL.
+        """
+        if getattr(self, "_checkpointer", None) is not None:
+            return self._checkpointer
 
         # Import shared checkpointer from graph.py to avoid duplicate connections
         from .graph import memory
@@ -446,25 +858,21 @@ class TripPlannerGraph:
         return memory
 
 
-# Create the graph instance
-trip_planner = TripPlannerGraph()
-graph = trip_planner.graph
-
-# Also create a version without interrupts for direct execution
-graph_no_interrupt = StateGraph(TripState)
-graph_no_interrupt.add_node("planner", trip_planner.plan_node)
-graph_no_interrupt.add_node("travel_plan", trip_planner.travel_plan_node)
-graph_no_interrupt.add_node("generate", trip_planner.generation_node)
-graph_no_interrupt.add_node("reflect", trip_planner.reflection_node)
-graph_no_interrupt.add_node("travel_critique", trip_planner.travel_critique_node)
-graph_no_interrupt.set_entry_point("planner")
-graph_no_interrupt.add_conditional_edges(
-    "generate", trip_planner.should_continue, {END: END, "reflect": "reflect"}
-)
-graph_no_interrupt.add_edge("planner", "travel_plan")
-graph_no_interrupt.add_edge("travel_plan", "generate")
-graph_no_interrupt.add_edge("reflect", "travel_critique")
-graph_no_interrupt.add_edge("travel_critique", "generate")
-graph_no_interrupt = graph_no_interrupt.compile(
-    checkpointer=trip_planner._get_postgres_checkpointer()
-)
+@lru_cache(maxsize=None)
+def get_trip_planner() -> TripPlannerGraph:
+    """Create the shared TripPlannerGraph on first use.
+
+    Building it opens the Bedrock/Tavily clients and compiles both graphs, so
+    importing this module (e.g. for TripState or the default prompts) stays
+    cheap until a graph is actually needed.
+    """
+    return TripPlannerGraph()
+
+
+def __getattr__(name: str):
+    # Module-level trip_planner / graph / graph_no_interrupt, built lazily
+    if name == "trip_planner":
+        return get_trip_planner()
+    if name in ("graph", "graph_no_interrupt"):
+        return getattr(get_trip_planner(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,26 @@
 """FastAPI application for LangGraph Playground with HITL support."""
 
+import asyncio
+import hashlib
 import os
+import threading
 import uuid
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import json
+import orjson
 
-from .trip_graph import graph, graph_no_interrupt, TripState
+from .trip_graph import TripState, get_trip_planner
 from .state_manager import StateManager, GraphRunner, create_state_manager
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
 
 # Load environment variables
 load_dotenv()
@@ -28,12 +34,67 @@ logger = logging.getLogger(__name__)
 # Get ROOT_PATH from environment (for nginx subpath deployment)
 ROOT_PATH = os.getenv("ROOT_PATH", "")
 
+
+def get_graph(use_hitl: bool = True):
+    """Get the trip planner graph, with or without the HITL interrupts.
+
+    The planner (Bedrock/Tavily clients, Postgres checkpointer) is built by
+    the first request that needs it, not when this module is imported.
+    """
+    trip_planner = get_trip_planner()
+    return trip_planner.graph if use_hitl else trip_planner.graph_no_interrupt
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release trip planner resources (HTTP connections, threads) on shutdown."""
+    yield
+    if get_trip_planner.cache_info().currsize:
+        get_trip_planner().close()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (much faster than stdlib json)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _sse(data: Any) -> bytes:
+    """Encode one server-sent event; bytes go to the client without re-encoding."""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+# Keep proxies from buffering or caching the event stream (nginx honors
+# X-Accel-Buffering even where proxy_buffering was left on)
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _checkpoint_etag(checkpoint_id: Optional[str], *variant: Any) -> Optional[str]:
+    """Weak ETag for a response built from one checkpoint (None if no checkpoint).
+
+    ``variant`` holds the query parameters that change the response shape.
+    """
+    if checkpoint_id is None:
+        return None
+    return 'W/"' + "-".join(map(str, (checkpoint_id, *variant))) + '"'
+
+
+def _not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """304 response when the client's If-None-Match already matches ``etag``."""
+    if etag is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
 # Create FastAPI app
 app = FastAPI(
     title="LangGraph Playground",
     description="Interactive playground for LangGraph concepts with HITL support",
     version="1.0.0",
     root_path=ROOT_PATH,  # Tell FastAPI about the base path
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -91,6 +152,15 @@ if os.path.exists(REACT_BUILD_DIR):
         # So with root_path="/langgraphplayground", this becomes /langgraphplayground/assets
         app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
 
+# index.html is read once here (like the assets mount above), so SPA
+# navigations don't stat and open the file on every request
+_REACT_INDEX = os.path.join(REACT_BUILD_DIR, "index.html")
+if os.path.exists(_REACT_INDEX):
+    with open(_REACT_INDEX, "rb") as f:
+        _INDEX_HTML: Optional[bytes] = f.read()
+else:
+    _INDEX_HTML = None
+
 
 @app.get("/health")
 async def health():
@@ -100,7 +170,7 @@ async def health():
 
 # Thread management endpoints
 @app.post("/threads")
-async def create_thread(input: ThreadCreate = None):
+def create_thread(input: ThreadCreate = None):
     """Create a new conversation thread."""
     thread_id = input.thread_id if input and input.thread_id else str(uuid.uuid4())
 
@@ -109,7 +179,7 @@ async def create_thread(input: ThreadCreate = None):
 
     # Initialize with empty state
     try:
-        state = graph.get_state(config)
+        state = get_graph().get_state(config)
         return {
             "thread_id": thread_id,
             "created": True,
@@ -122,12 +192,19 @@ async def create_thread(input: ThreadCreate = None):
 
 
 @app.get("/threads/{thread_id}")
-async def get_thread(thread_id: str):
+def get_thread(thread_id: str, request: Request, response: Response):
     """Get thread information."""
     config = {"configurable": {"thread_id": thread_id}}
 
     try:
-        state = graph.get_state(config)
+        state = get_graph().get_state(config)
+
+        etag = _checkpoint_etag(state.config["configurable"].get("checkpoint_id"))
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        if etag:
+            response.headers["ETag"] = etag
 
         return {
             "thread_id": thread_id,
@@ -147,15 +224,22 @@ async def get_thread(thread_id: str):
 
 
 @app.get("/threads/{thread_id}/state")
-async def get_state(thread_id: str):
+def get_state(thread_id: str, request: Request, response: Response):
     """Get current state of a thread."""
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         state = state_manager.get_current_state()
 
         if not state.values:
             raise HTTPException(status_code=404, detail="Thread state not found")
 
+        checkpoint_id = state.config.get("configurable", {}).get("checkpoint_id")
+        etag = _checkpoint_etag(checkpoint_id)
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        response.headers["ETag"] = etag
+
         # Use StateManager's serialization
         messages = state_manager._serialize_messages(state.values.get("messages", []))
 
@@ -163,7 +247,7 @@ async def get_state(thread_id: str):
             "thread_id": thread_id,
             "messages": messages,
             "next": state.next,
-            "checkpoint_id": state.config.get("configurable", {}).get("checkpoint_id"),
+            "checkpoint_id": checkpoint_id,
         }
     except HTTPException:
         raise
@@ -172,10 +256,40 @@ async def get_state(thread_id: str):
 
 
 @app.get("/threads/{thread_id}/history")
-async def get_history(thread_id: str, limit: int = 10):
-    """Get checkpoint history for a thread."""
+def get_history(
+    thread_id: str,
+    request: Request,
+    response: Response,
+    limit: int = 10,
+    columns: bool = False,
+):
+    """Get checkpoint history for a thread.
+
+    With ``columns=true`` the checkpoints are returned as parallel lists
+    (checkpoint_ids, next_nodes, ...) instead of one object per checkpoint.
+    The ETag follows the newest checkpoint, so polling clients get a 304
+    without the history being loaded again.
+    """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
+
+        etag = _checkpoint_etag(
+            state_manager.get_latest_checkpoint_id(), limit, int(columns)
+        )
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        if etag:
+            response.headers["ETag"] = etag
+
+        if columns:
+            history = state_manager.get_state_history_columns(limit=limit)
+            return {
+                "thread_id": thread_id,
+                "total": len(history["checkpoint_ids"]),
+                "columns": history,
+            }
+
         checkpoints = state_manager.get_state_history(
             limit=limit, include_metadata=False
         )
@@ -190,6 +304,23 @@ async def get_history(thread_id: str, limit: int = 10):
 
 
 # Agent interaction endpoints
+def _invoke_graph(agent, graph_input, config):
+    """Run the graph like ``invoke`` and report whether it paused.
+
+    Returns ``(values, interrupted)``. The interrupt shows up in the updates
+    stream, so callers only need a ``get_state`` round-trip when it fired.
+    """
+    values, interrupted = None, False
+    for mode, chunk in agent.stream(
+        graph_input, config=config, stream_mode=["values", "updates"]
+    ):
+        if mode == "values":
+            values = chunk
+        elif "__interrupt__" in chunk:
+            interrupted = True
+    return values, interrupted
+
+
 @app.post("/runs/invoke")
 async def invoke_agent(input: RunInput):
     """Run agent without streaming (single response)."""
@@ -204,13 +335,13 @@ async def invoke_agent(input: RunInput):
 
     try:
         # Choose graph based on HITL setting
-        agent = graph if input.use_hitl else graph_no_interrupt
+        agent = get_graph(input.use_hitl)
         logger.info(
             f"🔀 Using graph: {'WITH interrupts (HITL)' if input.use_hitl else 'WITHOUT interrupts'}"
         )
 
         # Check if there's existing state
-        existing_state = agent.get_state(config)
+        existing_state = await run_in_threadpool(agent.get_state, config)
 
         # If there's existing state with a task, continue from checkpoint (use None input)
         # Otherwise, create new trip input
@@ -223,7 +354,9 @@ async def invoke_agent(input: RunInput):
             logger.info(
                 f"🔢 Revision number: {existing_state.values.get('revision_number', 0)}"
             )
-            result = agent.invoke(None, config=config)
+            result, interrupted = await run_in_threadpool(
+                _invoke_graph, agent, None, config
+            )
         else:
             # Create new input for trip planner - use message as task
             logger.info(
@@ -241,19 +374,21 @@ async def invoke_agent(input: RunInput):
                 "plan": "",
                 "draft": "",
                 "critique": "",
+                "critique_converged": False,
                 "content": [],
                 "queries": [],
                 "messages": [HumanMessage(content=input.message)],
             }
 
-            # Invoke agent
-            result = agent.invoke(trip_input, config=config)
+            # Invoke agent (off the event loop - nodes block on Bedrock/Tavily)
+            result, interrupted = await run_in_threadpool(
+                _invoke_graph, agent, trip_input, config
+            )
 
-        # Check if interrupted (waiting for approval)
-        state = agent.get_state(config)
-        logger.info(f"📊 Graph execution completed - state.next: {state.next}")
+        logger.info(f"📊 Graph execution completed - interrupted: {interrupted}")
 
-        if state.next:  # Interrupted
+        if interrupted:  # Waiting for approval
+            state = await run_in_threadpool(agent.get_state, config)
             logger.info(f"⏸️ INTERRUPTED at node(s): {state.next}")
             logger.info(
                 f"📋 Current state values - task: '{state.values.get('task', '')[:50]}...', plan: {len(state.values.get('plan', ''))} chars, draft: {len(state.values.get('draft', ''))} chars"
@@ -283,7 +418,7 @@ async def invoke_agent(input: RunInput):
                 f"✅ COMPLETED - Final draft: {len(result.get('draft', ''))} chars"
             )
             logger.info(
-                f"📝 Revisions: {result.get('revision_number', 0)}/{state.values.get('max_revisions', 2)}"
+                f"📝 Revisions: {result.get('revision_number', 0)}/{result.get('max_revisions', 2)}"
             )
             return {
                 "status": "completed",
@@ -302,6 +437,60 @@ async def invoke_agent(input: RunInput):
         raise HTTPException(status_code=500, detail=f"Error running agent: {str(e)}")
 
 
+# Nodes whose LLM output is streamed token-by-token to the client (the
+# research nodes are left out: their output is a structured query list)
+TOKEN_STREAM_NODES = {"planner", "generate", "reflect"}
+
+
+def _chunk_text(content: Any) -> str:
+    """Extract the text of a streamed message chunk (str or content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content if isinstance(block, dict)
+    )
+
+
+# Marks the end of a graph stream fed through _stream_in_thread
+_STREAM_DONE = object()
+
+
+async def _stream_in_thread(agent, stream_input, config, stream_mode):
+    """Iterate ``agent.stream`` in a worker thread, yielding its events here.
+
+    The graph blocks on Bedrock/Tavily between events, so the sync iterator
+    is drained in the threadpool and handed over through an asyncio.Queue;
+    the event loop stays free to flush SSE bytes and serve other requests.
+    If the client goes away the worker stops at the next event.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for item in agent.stream(
+                stream_input, config=config, stream_mode=stream_mode
+            ):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
+
+    worker = loop.run_in_executor(None, producer)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                break
+            yield item
+        # Re-raises anything the graph raised in the worker thread
+        await worker
+    finally:
+        stop.set()
+
+
 @app.post("/runs/stream")
 async def stream_agent(input: RunInput):
     """Stream agent execution with real-time events."""
@@ -316,13 +505,13 @@ async def stream_agent(input: RunInput):
 
     async def event_generator():
         try:
-            agent = graph if input.use_hitl else graph_no_interrupt
+            agent = get_graph(input.use_hitl)
             logger.info(
                 f"🔀 Using graph: {'WITH interrupts (HITL)' if input.use_hitl else 'WITHOUT interrupts'}"
             )
 
             # Check if there's existing state
-            existing_state = agent.get_state(config)
+            existing_state = await run_in_threadpool(agent.get_state, config)
 
             # If there's existing state with a task, continue from checkpoint (use None input)
             # Otherwise, create new trip input
@@ -350,14 +539,31 @@ async def stream_agent(input: RunInput):
                     "plan": "",
                     "draft": "",
                     "critique": "",
+                    "critique_converged": False,
                     "content": [],
                     "queries": [],
                     "messages": [HumanMessage(content=input.message)],
                 }
 
-            for event in agent.stream(
-                stream_input, config=config, stream_mode="updates"
+            async for mode, event in _stream_in_thread(
+                agent, stream_input, config, ["updates", "messages"]
             ):
+                if mode == "messages":
+                    # LLM token chunk - forward draft tokens as they are generated.
+                    # Messages mode also emits each node's finished messages
+                    # (e.g. the "Step ..." status); those arrive as the node
+                    # event, not as tokens
+                    message_chunk, metadata = event
+                    if not isinstance(message_chunk, AIMessageChunk):
+                        continue
+                    node_name = metadata.get("langgraph_node")
+                    token = _chunk_text(message_chunk.content)
+                    if node_name in TOKEN_STREAM_NODES and token:
+                        yield _sse(
+                            {"event": "token", "node": node_name, "content": token}
+                        )
+                    continue
+
                 # Each event contains updates from one or more nodes
                 for node_name, node_output in event.items():
                     logger.info(f"🔄 Streaming node: {node_name}")
@@ -394,10 +600,10 @@ async def stream_agent(input: RunInput):
                             "content": latest_message.content,
                         }
 
-                    yield f"data: {json.dumps(event_data)}\n\n"
+                    yield _sse(event_data)
 
             # After ALL events, check final state for interrupt (Human-in-the-Loop)
-            state = agent.get_state(config)
+            state = await run_in_threadpool(agent.get_state, config)
             if state.next:
                 logger.info(f"⏸️ Stream interrupted at node(s): {state.next}")
                 logger.info(f"📊 Current state - Next to execute: {state.next}")
@@ -448,26 +654,29 @@ async def stream_agent(input: RunInput):
                             f"   Last message content: {getattr(last_message, 'content', 'N/A')[:100]}"
                         )
 
-                yield f"data: {json.dumps(interrupt_data)}\n\n"
+                yield _sse(interrupt_data)
             else:
                 # If we got here, the graph completed without interruption
                 logger.info(f"✅ Stream completed")
-                yield f"data: {json.dumps({'event': 'complete'})}\n\n"
+                yield _sse({"event": "complete"})
 
         except Exception as e:
-            yield f"data: {json.dumps({'event': 'error', 'error': str(e)})}\n\n"
+            yield _sse({"event": "error", "error": str(e)})
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    return StreamingResponse(
+        event_generator(), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
 
 
 @app.post("/runs/resume")
 async def resume_agent(input: ResumeInput):
     """Resume agent execution after HITL approval (Human-in-the-Loop)."""
     config = {"configurable": {"thread_id": input.thread_id}}
+    graph = get_graph()
 
     try:
         # Check current state
-        state = graph.get_state(config)
+        state = await run_in_threadpool(graph.get_state, config)
 
         if not state.next:
             logger.warning("⚠️ Resume called but no pending action to resume")
@@ -486,7 +695,8 @@ async def resume_agent(input: ResumeInput):
             logger.info("   Adding rejection message to state...")
 
             # Update state with rejection message
-            graph.update_state(
+            await run_in_threadpool(
+                graph.update_state,
                 config,
                 {
                     "messages": [
@@ -520,14 +730,16 @@ async def resume_agent(input: ResumeInput):
                     content="", tool_calls=[modified_tool_call]
                 )
 
-                graph.update_state(config, {"messages": [modified_message]})
+                await run_in_threadpool(
+                    graph.update_state, config, {"messages": [modified_message]}
+                )
                 logger.info("✓ Tool arguments updated in state")
 
         logger.info("▶️  Resuming graph execution from checkpoint...")
         logger.info("=" * 70)
 
         # Resume execution - this will execute the tool and continue the graph
-        result = graph.invoke(None, config=config)
+        result = await run_in_threadpool(graph.invoke, None, config=config)
 
         logger.info("✓ Graph execution completed after approval")
 
@@ -549,12 +761,11 @@ async def resume_agent(input: ResumeInput):
 
 # State management endpoints
 @app.post("/threads/{thread_id}/update")
-async def update_state(thread_id: str, input: StateUpdateInput):
-    """Update thread state."""
-    config = {"configurable": {"thread_id": thread_id}}
-
+def update_state(thread_id: str, input: StateUpdateInput):
+    """Update thread state (edited values replace the fields)."""
     try:
-        graph.update_state(config, input.updates)
+        state_manager = create_state_manager(get_graph(), thread_id)
+        state_manager.update_state_values(input.updates)
 
         return {"status": "updated", "thread_id": thread_id, "updates": input.updates}
     except Exception as e:
@@ -562,24 +773,15 @@ async def update_state(thread_id: str, input: StateUpdateInput):
 
 
 @app.post("/threads/{thread_id}/rewind")
-async def rewind_checkpoint(thread_id: str, input: CheckpointRewind):
+def rewind_checkpoint(thread_id: str, input: CheckpointRewind):
     """Time travel to a specific checkpoint."""
     try:
-        # Get history
-        config = {"configurable": {"thread_id": thread_id}}
-        history = list(graph.get_state_history(config))
-
-        # Find checkpoint
-        target_checkpoint = None
-        for state in history:
-            if (
-                state.config.get("configurable", {}).get("checkpoint_id")
-                == input.checkpoint_id
-            ):
-                target_checkpoint = state
-                break
+        # Fetch the checkpoint directly instead of scanning the history
+        state_manager = create_state_manager(get_graph(), thread_id)
+        target_checkpoint = state_manager.get_checkpoint_state(input.checkpoint_id)
 
-        if not target_checkpoint:
+        # An unknown id yields an empty snapshot that was never saved
+        if target_checkpoint.created_at is None:
             raise HTTPException(status_code=404, detail="Checkpoint not found")
 
         return {
@@ -597,224 +799,255 @@ async def rewind_checkpoint(thread_id: str, input: CheckpointRewind):
 
 
 # Graph information endpoints
+GRAPH_INFO = {
+    "nodes": [
+        "planner",
+        "research_plan",
+        "generate",
+        "reflect",
+        "research_critique",
+    ],
+    "edges": [
+        {"from": "START", "to": "planner"},
+        {"from": "START", "to": "research_plan"},
+        {"from": "planner", "to": "generate"},
+        {"from": "research_plan", "to": "generate"},
+        {"from": "generate", "to": "reflect", "conditional": True},
+        {"from": "generate", "to": "END", "conditional": True},
+        {"from": "reflect", "to": "research_critique"},
+        {"from": "research_critique", "to": "generate"},
+    ],
+    "interrupt_before": ["planner", "generate", "reflect"],
+    "checkpointer": "PostgresSaver",
+    "graph_type": "trip_planner",
+}
+
+
+GRAPH_NODES = {
+    "nodes": [
+        {
+            "id": "START",
+            "name": "START",
+            "type": "entry",
+            "description": "Entry point of the graph",
+            "edges_to": ["planner", "research_plan"],
+            "can_interrupt": False,
+            "editable_prompt": None,
+        },
+        {
+            "id": "planner",
+            "name": "planner",
+            "type": "function",
+            "description": "Creates a high-level trip outline based on the destination",
+            "edges_to": ["generate"],
+            "can_interrupt": True,
+            "interrupt_before": True,
+            "editable_prompt": "planner_prompt",
+        },
+        {
+            "id": "research_plan",
+            "name": "research_plan",
+            "type": "function",
+            "description": "Generates search queries and gathers research content",
+            "edges_to": ["generate"],
+            "can_interrupt": False,
+            "editable_prompt": "research_plan_prompt",
+        },
+        {
+            "id": "generate",
+            "name": "generate",
+            "type": "function",
+            "description": "Creates the trip itinerary using the outline and research",
+            "edges_to": ["reflect", "END"],
+            "edges_conditional": True,
+            "can_interrupt": True,
+            "interrupt_before": True,
+            "editable_prompt": "generator_prompt",
+        },
+        {
+            "id": "reflect",
+            "name": "reflect",
+            "type": "function",
+            "description": "Reviews the trip itinerary and provides expert feedback",
+            "edges_to": ["research_critique"],
+            "can_interrupt": True,
+            "interrupt_before": True,
+            "editable_prompt": "critic_prompt",
+        },
+        {
+            "id": "research_critique",
+            "name": "research_critique",
+            "type": "function",
+            "description": "Researches additional information to address critique",
+            "edges_to": ["generate"],
+            "can_interrupt": False,
+            "editable_prompt": "research_critique_prompt",
+        },
+        {
+            "id": "END",
+            "name": "END",
+            "type": "exit",
+            "description": "End of graph execution - trip plan is complete",
+            "edges_to": [],
+            "can_interrupt": False,
+            "editable_prompt": None,
+        },
+    ],
+    "edges": [
+        {
+            "from": "START",
+            "to": "planner",
+            "conditional": False,
+            "description": "Initial invocation - start with planning",
+        },
+        {
+            "from": "START",
+            "to": "research_plan",
+            "conditional": False,
+            "description": "Initial invocation - gather research in parallel with planning",
+        },
+        {
+            "from": "planner",
+            "to": "generate",
+            "conditional": False,
+            "description": "Wait for both outline and research, then generate first draft",
+        },
+        {
+            "from": "research_plan",
+            "to": "generate",
+            "conditional": False,
+            "description": "Wait for both outline and research, then generate first draft",
+        },
+        {
+            "from": "generate",
+            "to": "reflect",
+            "conditional": True,
+            "description": "Continue to reflection if under max revisions",
+        },
+        {
+            "from": "generate",
+            "to": "END",
+            "conditional": True,
+            "description": "End if max revisions reached",
+        },
+        {
+            "from": "reflect",
+            "to": "research_critique",
+            "conditional": False,
+            "description": "After critique, research improvements",
+        },
+        {
+            "from": "research_critique",
+            "to": "generate",
+            "conditional": False,
+            "description": "Generate revised draft with new research",
+        },
+    ],
+    "entry_point": "planner",
+    "interrupt_before": ["planner", "generate", "reflect"],
+    "checkpointer": "PostgresSaver",
+    "state_schema": {
+        "task": {
+            "type": "string",
+            "description": "The trip destination or request",
+            "required": True,
+        },
+        "plan": {"type": "string", "description": "Trip outline"},
+        "draft": {"type": "string", "description": "Current trip itinerary"},
+        "critique": {"type": "string", "description": "Feedback on the draft"},
+        "critique_converged": {
+            "type": "bool",
+            "description": "Critique repeats the previous one (stops revising)",
+        },
+        "content": {"type": "list", "description": "Research content"},
+        "queries": {"type": "list", "description": "Search queries used"},
+        "revision_number": {"type": "int", "description": "Current revision"},
+        "max_revisions": {
+            "type": "int",
+            "description": "Max allowed revisions",
+            "default": 2,
+        },
+        "planner_prompt": {
+            "type": "string",
+            "description": "Editable prompt for planner node",
+            "editable": True,
+        },
+        "research_plan_prompt": {
+            "type": "string",
+            "description": "Editable prompt for research_plan node",
+            "editable": True,
+        },
+        "generator_prompt": {
+            "type": "string",
+            "description": "Editable prompt for generate node",
+            "editable": True,
+        },
+        "critic_prompt": {
+            "type": "string",
+            "description": "Editable prompt for reflect node",
+            "editable": True,
+        },
+        "research_critique_prompt": {
+            "type": "string",
+            "description": "Editable prompt for research_critique node",
+            "editable": True,
+        },
+        "temperature": {
+            "type": "float",
+            "description": "LLM temperature",
+            "editable": True,
+        },
+        "max_tokens": {
+            "type": "int",
+            "description": "Max tokens",
+            "editable": True,
+        },
+    },
+}
+
+# Both payloads are static: serialize once and let clients revalidate
+_GRAPH_INFO_BODY = orjson.dumps(GRAPH_INFO)
+_GRAPH_INFO_ETAG = f'"{hashlib.sha1(_GRAPH_INFO_BODY).hexdigest()}"'
+_GRAPH_NODES_BODY = orjson.dumps(GRAPH_NODES)
+_GRAPH_NODES_ETAG = f'"{hashlib.sha1(_GRAPH_NODES_BODY).hexdigest()}"'
+
+
+def _json_with_etag(request: Request, body: bytes, etag: str) -> Response:
+    """Return pre-serialized JSON, or 304 when the client's copy is current."""
+    return _not_modified(request, etag) or Response(
+        body, media_type="application/json", headers={"ETag": etag}
+    )
+
+
 @app.get("/graph/info")
-async def get_graph_info():
+async def get_graph_info(request: Request):
     """Get current graph structure."""
-    return {
-        "nodes": [
-            "planner",
-            "research_plan",
-            "generate",
-            "reflect",
-            "research_critique",
-        ],
-        "edges": [
-            {"from": "START", "to": "planner"},
-            {"from": "planner", "to": "research_plan"},
-            {"from": "research_plan", "to": "generate"},
-            {"from": "generate", "to": "reflect", "conditional": True},
-            {"from": "generate", "to": "END", "conditional": True},
-            {"from": "reflect", "to": "research_critique"},
-            {"from": "research_critique", "to": "generate"},
-        ],
-        "interrupt_before": ["planner", "generate", "reflect"],
-        "checkpointer": "PostgresSaver",
-        "graph_type": "trip_planner",
-    }
+    return _json_with_etag(request, _GRAPH_INFO_BODY, _GRAPH_INFO_ETAG)
 
 
 @app.get("/graph/nodes")
-async def get_graph_nodes():
+async def get_graph_nodes(request: Request):
     """Get detailed information about all graph nodes."""
-    return {
-        "nodes": [
-            {
-                "id": "START",
-                "name": "START",
-                "type": "entry",
-                "description": "Entry point of the graph",
-                "edges_to": ["planner"],
-                "can_interrupt": False,
-                "editable_prompt": None,
-            },
-            {
-                "id": "planner",
-                "name": "planner",
-                "type": "function",
-                "description": "Creates a high-level trip outline based on the destination",
-                "edges_to": ["research_plan"],
-                "can_interrupt": True,
-                "interrupt_before": True,
-                "editable_prompt": "planner_prompt",
-            },
-            {
-                "id": "research_plan",
-                "name": "research_plan",
-                "type": "function",
-                "description": "Generates search queries and gathers research content",
-                "edges_to": ["generate"],
-                "can_interrupt": False,
-                "editable_prompt": "research_plan_prompt",
-            },
-            {
-                "id": "generate",
-                "name": "generate",
-                "type": "function",
-                "description": "Creates the trip itinerary using the outline and research",
-                "edges_to": ["reflect", "END"],
-                "edges_conditional": True,
-                "can_interrupt": True,
-                "interrupt_before": True,
-                "editable_prompt": "generator_prompt",
-            },
-            {
-                "id": "reflect",
-                "name": "reflect",
-                "type": "function",
-                "description": "Reviews the trip itinerary and provides expert feedback",
-                "edges_to": ["research_critique"],
-                "can_interrupt": True,
-                "interrupt_before": True,
-                "editable_prompt": "critic_prompt",
-            },
-            {
-                "id": "research_critique",
-                "name": "research_critique",
-                "type": "function",
-                "description": "Researches additional information to address critique",
-                "edges_to": ["generate"],
-                "can_interrupt": False,
-                "editable_prompt": "research_critique_prompt",
-            },
-            {
-                "id": "END",
-                "name": "END",
-                "type": "exit",
-                "description": "End of graph execution - trip plan is complete",
-                "edges_to": [],
-                "can_interrupt": False,
-                "editable_prompt": None,
-            },
-        ],
-        "edges": [
-            {
-                "from": "START",
-                "to": "planner",
-                "conditional": False,
-                "description": "Initial invocation - start with planning",
-            },
-            {
-                "from": "planner",
-                "to": "research_plan",
-                "conditional": False,
-                "description": "After planning, gather research",
-            },
-            {
-                "from": "research_plan",
-                "to": "generate",
-                "conditional": False,
-                "description": "After research, generate first draft",
-            },
-            {
-                "from": "generate",
-                "to": "reflect",
-                "conditional": True,
-                "description": "Continue to reflection if under max revisions",
-            },
-            {
-                "from": "generate",
-                "to": "END",
-                "conditional": True,
-                "description": "End if max revisions reached",
-            },
-            {
-                "from": "reflect",
-                "to": "research_critique",
-                "conditional": False,
-                "description": "After critique, research improvements",
-            },
-            {
-                "from": "research_critique",
-                "to": "generate",
-                "conditional": False,
-                "description": "Generate revised draft with new research",
-            },
-        ],
-        "entry_point": "planner",
-        "interrupt_before": ["planner", "generate", "reflect"],
-        "checkpointer": "PostgresSaver",
-        "state_schema": {
-            "task": {
-                "type": "string",
-                "description": "The trip destination or request",
-                "required": True,
-            },
-            "plan": {"type": "string", "description": "Trip outline"},
-            "draft": {"type": "string", "description": "Current trip itinerary"},
-            "critique": {"type": "string", "description": "Feedback on the draft"},
-            "content": {"type": "list", "description": "Research content"},
-            "queries": {"type": "list", "description": "Search queries used"},
-            "revision_number": {"type": "int", "description": "Current revision"},
-            "max_revisions": {
-                "type": "int",
-                "description": "Max allowed revisions",
-                "default": 2,
-            },
-            "planner_prompt": {
-                "type": "string",
-                "description": "Editable prompt for planner node",
-                "editable": True,
-            },
-            "research_plan_prompt": {
-                "type": "string",
-                "description": "Editable prompt for research_plan node",
-                "editable": True,
-            },
-            "generator_prompt": {
-                "type": "string",
-                "description": "Editable prompt for generate node",
-                "editable": True,
-            },
-            "critic_prompt": {
-                "type": "string",
-                "description": "Editable prompt for reflect node",
-                "editable": True,
-            },
-            "research_critique_prompt": {
-                "type": "string",
-                "description": "Editable prompt for research_critique node",
-                "editable": True,
-            },
-            "temperature": {
-                "type": "float",
-                "description": "LLM temperature",
-                "editable": True,
-            },
-            "max_tokens": {
-                "type": "int",
-                "description": "Max tokens",
-                "editable": True,
-            },
-        },
-    }
+    return _json_with_etag(request, _GRAPH_NODES_BODY, _GRAPH_NODES_ETAG)
 
 
 @app.get("/threads/{thread_id}/state/fields")
-async def get_state_fields(thread_id: str):
+def get_state_fields(thread_id: str, message_tail: Optional[int] = None):
     """Get available state fields and their current values.
 
     Educational endpoint: Shows all editable state fields including prompts!
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
-        state = state_manager.get_current_state()
+        state_manager = create_state_manager(get_graph(), thread_id)
 
-        if not state.values:
-            raise HTTPException(status_code=404, detail="Thread state not found")
+        # One snapshot serves the check, the fields and the metadata
+        with state_manager.snapshot() as state:
+            if not state.values:
+                raise HTTPException(status_code=404, detail="Thread state not found")
 
-        # Use StateManager's generic field introspection
-        fields_info = state_manager.get_state_fields_info()
-        display_info = state_manager.get_display_info()
+            # Use StateManager's generic field introspection
+            fields_info = state_manager.get_state_fields_info(message_tail=message_tail)
+            display_info = state_manager.get_display_info()
 
         return {
             "thread_id": thread_id,
@@ -834,13 +1067,13 @@ async def get_state_fields(thread_id: str):
 
 
 @app.get("/threads/{thread_id}/prompts")
-async def get_prompts(thread_id: str):
+def get_prompts(thread_id: str):
     """Get all editable prompts for the thread.
 
     Educational endpoint: Students can see and modify prompts to experiment!
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         prompts = state_manager.get_all_prompts()
 
         return {
@@ -853,13 +1086,13 @@ async def get_prompts(thread_id: str):
 
 
 @app.get("/threads/{thread_id}/prompts/{prompt_name}")
-async def get_prompt(thread_id: str, prompt_name: str):
+def get_prompt(thread_id: str, prompt_name: str):
     """Get a specific prompt.
 
     Educational endpoint: View individual prompt content.
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         prompt_value = state_manager.get_prompt(prompt_name)
 
         return {
@@ -886,8 +1119,8 @@ async def update_prompt(thread_id: str, prompt_name: str, request: Request):
         if not new_prompt:
             raise HTTPException(status_code=400, detail="Prompt text is required")
 
-        state_manager = create_state_manager(graph, thread_id)
-        state_manager.update_prompt(prompt_name, new_prompt)
+        state_manager = create_state_manager(get_graph(), thread_id)
+        await run_in_threadpool(state_manager.update_prompt, prompt_name, new_prompt)
 
         return {
             "status": "updated",
@@ -902,13 +1135,13 @@ async def update_prompt(thread_id: str, prompt_name: str, request: Request):
 
 
 @app.post("/threads/{thread_id}/prompts/{prompt_name}/reset")
-async def reset_prompt(thread_id: str, prompt_name: str):
+def reset_prompt(thread_id: str, prompt_name: str):
     """Reset a prompt to its default value.
 
     Educational endpoint: Reset experiments back to default!
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         state_manager.reset_prompt_to_default(prompt_name)
 
         default_prompt = state_manager.get_prompt(prompt_name)
@@ -924,14 +1157,14 @@ async def reset_prompt(thread_id: str, prompt_name: str):
 
 
 @app.post("/threads/{thread_id}/prompts/initialize")
-async def initialize_prompts(thread_id: str):
+def initialize_prompts(thread_id: str):
     """Initialize editable prompts in thread state.
 
     Educational endpoint: Sets up prompts in state so students can edit them!
     Should be called after creating a new thread.
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         state_manager.initialize_prompts_in_state()
 
         prompts = state_manager.get_all_prompts()
@@ -948,13 +1181,13 @@ async def initialize_prompts(thread_id: str):
 
 
 @app.get("/threads/{thread_id}/parameters")
-async def get_parameters(thread_id: str):
+def get_parameters(thread_id: str):
     """Get editable model parameters (temperature, max_tokens, etc).
 
     Educational endpoint: Students can adjust LLM parameters!
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         state = state_manager.get_current_state()
 
         parameters = {
@@ -1007,8 +1240,8 @@ async def update_parameters(thread_id: str, request: Request):
         if not updates:
             raise HTTPException(status_code=400, detail="No valid parameters provided")
 
-        state_manager = create_state_manager(graph, thread_id)
-        state_manager.update_state_values(updates)
+        state_manager = create_state_manager(get_graph(), thread_id)
+        await run_in_threadpool(state_manager.update_state_values, updates)
 
         return {"status": "updated", "thread_id": thread_id, "parameters": updates}
     except HTTPException:
@@ -1024,18 +1257,19 @@ async def update_parameters(thread_id: str, request: Request):
 
 
 @app.get("/threads/{thread_id}/state/fields")
-async def get_state_fields(thread_id: str):
+def get_state_fields(thread_id: str, message_tail: Optional[int] = None):
     """Get available state fields and their current values."""
     try:
-        state_manager = create_state_manager(graph, thread_id)
-        state = state_manager.get_current_state()
+        state_manager = create_state_manager(get_graph(), thread_id)
 
-        if not state.values:
-            raise HTTPException(status_code=404, detail="Thread state not found")
+        # One snapshot serves the check, the fields and the metadata
+        with state_manager.snapshot() as state:
+            if not state.values:
+                raise HTTPException(status_code=404, detail="Thread state not found")
 
-        # Use StateManager's generic field introspection
-        fields_info = state_manager.get_state_fields_info()
-        display_info = state_manager.get_display_info()
+            # Use StateManager's generic field introspection
+            fields_info = state_manager.get_state_fields_info(message_tail=message_tail)
+            display_info = state_manager.get_display_info()
 
         return {
             "thread_id": thread_id,
@@ -1055,10 +1289,10 @@ async def get_state_fields(thread_id: str):
 
 
 @app.post("/threads/{thread_id}/state/update")
-async def update_state_fields(thread_id: str, state_update: Dict[str, Any]):
+def update_state_fields(thread_id: str, state_update: Dict[str, Any]):
     """Allow users to manually edit graph state fields."""
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         current_state = state_manager.get_current_state()
 
         if not current_state.values:
@@ -1095,10 +1329,10 @@ async def update_state_fields(thread_id: str, state_update: Dict[str, Any]):
 
 
 @app.get("/threads/{thread_id}/checkpoints/{checkpoint_id}/state")
-async def get_checkpoint_state(thread_id: str, checkpoint_id: str):
+def get_checkpoint_state(thread_id: str, checkpoint_id: str):
     """Get the state at a specific checkpoint for time travel."""
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
         state = state_manager.get_checkpoint_state(checkpoint_id)
 
         if not state.values:
@@ -1132,18 +1366,22 @@ async def resume_from_checkpoint(
     If new_input is None, the graph will resume from the checkpoint with no new input.
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
+        state_manager = create_state_manager(get_graph(), thread_id)
 
         # Verify checkpoint exists
-        checkpoint_state = state_manager.get_checkpoint_state(checkpoint_id)
+        checkpoint_state = await run_in_threadpool(
+            state_manager.get_checkpoint_state, checkpoint_id
+        )
         if not checkpoint_state.values:
             raise HTTPException(status_code=404, detail="Checkpoint not found")
 
         # Resume from checkpoint using StateManager
-        result = state_manager.resume_from_checkpoint(checkpoint_id, new_input)
+        result = await run_in_threadpool(
+            state_manager.resume_from_checkpoint, checkpoint_id, new_input
+        )
 
         # Get final state
-        final_state = state_manager.get_current_state()
+        final_state = await run_in_threadpool(state_manager.get_current_state)
 
         # Use StateManager's serialization
         messages = state_manager._serialize_messages(
@@ -1166,7 +1404,9 @@ async def resume_from_checkpoint(
 
 
 @app.get("/threads/{thread_id}/snapshots")
-async def get_state_snapshots(thread_id: str, truncate: int = 80):
+def get_state_snapshots(
+    thread_id: str, truncate: int = 80, limit: Optional[int] = None
+):
     """Get formatted summary of all state snapshots (inspired by refractorRef.md).
 
     This provides a human-readable view of the entire state history,
@@ -1175,10 +1415,13 @@ async def get_state_snapshots(thread_id: str, truncate: int = 80):
     Args:
         thread_id: Thread identifier
         truncate: Maximum length for string values in output
+        limit: Only summarize the most recent N snapshots
     """
     try:
-        state_manager = create_state_manager(graph, thread_id)
-        summary = state_manager.get_snapshots_summary(truncate_length=truncate)
+        state_manager = create_state_manager(get_graph(), thread_id)
+        summary = state_manager.get_snapshots_summary(
+            truncate_length=truncate, limit=limit
+        )
 
         return {"thread_id": thread_id, "summary": summary, "truncate_length": truncate}
     except Exception as e:
@@ -1193,10 +1436,8 @@ async def get_state_snapshots(thread_id: str, truncate: int = 80):
 async def root():
     """Serve the playground UI (React build required)."""
     # Serve React build
-    if os.path.exists(REACT_BUILD_DIR):
-        react_index = os.path.join(REACT_BUILD_DIR, "index.html")
-        if os.path.exists(react_index):
-            return FileResponse(react_index)
+    if _INDEX_HTML is not None:
+        return HTMLResponse(_INDEX_HTML)
 
     # No fallback - require React build
     return {
@@ -1206,6 +1447,12 @@ async def root():
     }
 
 
+# First path segments owned by the API; serve_spa answers 404 for them
+_API_PREFIXES = frozenset(
+    {"threads", "runs", "graph", "health", "docs", "openapi.json"}
+)
+
+
 # Catch-all route for React Router (SPA)
 # This allows React Router to handle client-side routing
 @app.get("/{full_path:path}")
@@ -1220,9 +1467,7 @@ async def serve_spa(full_path: str):
         full_path = full_path[1:]
 
     # Skip if it's an API route (these are already defined above)
-    if full_path.startswith(
-        ("threads", "runs", "graph", "health", "docs", "openapi.json")
-    ):
+    if full_path.split("/", 1)[0] in _API_PREFIXES:
         raise HTTPException(status_code=404, detail="Not found")
 
     # Skip if it's a static asset (let the mount handle it)
@@ -1230,10 +1475,8 @@ async def serve_spa(full_path: str):
         raise HTTPException(status_code=404, detail="Asset not found")
 
     # Serve React index.html for all other routes
-    if os.path.exists(REACT_BUILD_DIR):
-        react_index = os.path.join(REACT_BUILD_DIR, "index.html")
-        if os.path.exists(react_index):
-            return FileResponse(react_index)
+    if _INDEX_HTML is not None:
+        return HTMLResponse(_INDEX_HTML)
 
     # If React build doesn't exist, return 404
     raise HTTPException(status_code=404, detail="Frontend not built")
@@ -1242,4 +1485,7 @@ async def serve_spa(full_path: str):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=2024)
+    # uvicorn[standard] ships uvloop and httptools, which the default
+    # loop="auto"/http="auto" already pick up. The import string (rather
+    # than the app object) lets uvicorn start WEB_CONCURRENCY workers.
+    uvicorn.run(f"{__spec__.name}:app", host="0.0.0.0", port=2024)
@@ -0,0 +1,79 @@
+"""Tests for parsing text tool calls from LLM output."""
+
+from src.agent.graph import parse_tool_call
+
+
+def test_plain_text_is_not_a_tool_call():
+    assert parse_tool_call("Paris is lovely in spring.") is None
+    assert parse_tool_call("") is None
+
+
+def test_whole_output_tool_call():
+    tool_call = parse_tool_call('{"tool": "calculator", "args": {"expression": "2+2"}}')
+
+    assert tool_call["name"] == "calculator"
+    assert tool_call["args"] == {"expression": "2+2"}
+    assert tool_call["id"].startswith("call_")
+
+
+def test_nested_args():
+    content = (
+        '{"tool": "search", "args": {"query": "hotels", "filters": {"stars": [4, 5]}}}'
+    )
+
+    assert parse_tool_call(content)["args"] == {
+        "query": "hotels",
+        "filters": {"stars": [4, 5]},
+    }
+
+
+def test_tool_call_preceded_by_prose():
+    content = (
+        'Let me look that up.\n{"tool": "search", "args": {"query": "Rome"}} Done.'
+    )
+
+    tool_call = parse_tool_call(content)
+
+    assert tool_call["name"] == "search"
+    assert tool_call["args"] == {"query": "Rome"}
+
+
+def test_skips_invalid_and_non_tool_objects():
+    content = (
+        'Options: {not json} and {"city": "Rome"} then '
+        '{"tool": "search", "args": {"query": "Rome"}} and '
+        '{"tool": "calculator", "args": {"expression": "1"}}'
+    )
+
+    assert parse_tool_call(content)["name"] == "search"
+
+
+def test_only_invalid_objects_is_not_a_tool_call():
+    assert parse_tool_call('{"tool": "search", "args": {') is None
+    assert parse_tool_call('{"city": "Rome"}') is None
+
+
+def test_spaced_and_pretty_printed_tool_calls():
+    spaced = '{ "tool" : "search" , "args" : { "query" : "Rome" } }'
+    pretty = '{\n  "tool": "search",\n  "args": {\n    "query": "Rome"\n  }\n}'
+
+    assert parse_tool_call(spaced)["args"] == {"query": "Rome"}
+    assert parse_tool_call(pretty)["args"] == {"query": "Rome"}
+
+
+def test_single_quotes_inside_values():
+    content = '{"tool": "search", "args": {"query": "Rome\'s best \'trattorias\'"}}'
+
+    assert parse_tool_call(content)["args"] == {"query": "Rome's best 'trattorias'"}
+
+
+def test_escaped_key_is_still_found():
+    content = '{"\\u0074ool": "search", "args": {"query": "Rome"}}'
+
+    assert parse_tool_call(content)["name"] == "search"
+
+
+def test_ids_are_unique():
+    content = '{"tool": "search", "args": {"query": "Rome"}}'
+
+    assert parse_tool_call(content)["id"] != parse_tool_call(content)["id"]
@@ -0,0 +1,103 @@
+"""Tests for StateManager state editing."""
+
+import operator
+from typing import Annotated, List, TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from src.agent.state_manager import GraphRunner, StateManager
+
+
+class ResearchState(TypedDict):
+    task: str
+    content: Annotated[List[str], operator.add]
+
+
+def _research_graph():
+    builder = StateGraph(ResearchState)
+    builder.add_node("research", lambda state: {"content": ["c"]})
+    builder.add_edge(START, "research")
+    builder.add_edge("research", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def _state_manager():
+    graph = _research_graph()
+    graph.invoke(
+        {"task": "Paris", "content": ["a", "b"]}, {"configurable": {"thread_id": "t"}}
+    )
+    return StateManager(graph, "t")
+
+
+def test_nodes_still_append_to_content():
+    assert _state_manager().get_state_value("content") == ["a", "b", "c"]
+
+
+def test_update_state_values_replaces_reducer_field():
+    state_manager = _state_manager()
+
+    state_manager.update_state_values({"content": ["a", "c"], "task": "Rome"})
+
+    assert state_manager.get_state_value("content") == ["a", "c"]
+    assert state_manager.get_state_value("task") == "Rome"
+
+
+def test_update_state_value_replaces_reducer_field():
+    state_manager = _state_manager()
+
+    state_manager.update_state_value("content", [])
+
+    assert state_manager.get_state_value("content") == []
+
+
+def test_update_endpoint_replaces_reducer_field(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from src.agent import webapp
+
+    state_manager = _state_manager()
+    monkeypatch.setattr(webapp, "get_graph", lambda use_hitl=True: state_manager.graph)
+
+    response = TestClient(webapp.app).post(
+        "/threads/t/update", json={"thread_id": "t", "updates": {"content": ["b"]}}
+    )
+
+    assert response.status_code == 200
+    assert state_manager.get_state_value("content") == ["b"]
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def test_streamed_tokens_are_llm_chunks_only():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="Hello there")]))
+
+    def agent(state):
+        llm.invoke(state["messages"])
+        return {"messages": [AIMessage(content="Status: done")]}
+
+    def tools(state):
+        return {"messages": [ToolMessage(content="42", tool_call_id="1")]}
+
+    builder = StateGraph(ChatState)
+    builder.add_node("agent", agent)
+    builder.add_node("tools", tools)
+    builder.add_edge(START, "agent")
+    builder.add_edge("agent", "tools")
+    builder.add_edge("tools", END)
+    runner = GraphRunner(builder.compile(checkpointer=MemorySaver()))
+
+    events = list(
+        runner.execute_with_streaming(
+            "t", {"messages": [("user", "hi")]}, stream_tokens=True
+        )
+    )
+
+    tokens = [e["content"] for e in events if e["event"] == "token"]
+    assert "".join(tokens) == "Hello there"
+    assert events[-1] == {"event": "complete"}
@@ -0,0 +1,48 @@
+"""Tests for the calculator tool."""
+
+import pytest
+
+from src.agent.tools import calculator
+
+
+def _calculate(expression):
+    return calculator.invoke({"expression": expression})
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("2+2*3", "Result: 8"),
+        ("(1 + 2) * -3", "Result: -9"),
+        ("7 // 2", "Result: 3"),
+        ("7 / 2", "Result: 3.5"),
+        ("0.1 + 0.2", "Result: 0.30000000000000004"),
+        ("2 ** 10", "Result: 1024"),
+        ("2 ** -1", "Result: 0.5"),
+    ],
+)
+def test_results_match_previous_format(expression, expected):
+    assert _calculate(expression) == expected
+
+
+def test_division_by_zero():
+    assert _calculate("1/0") == "Error: division by zero"
+
+
+@pytest.mark.parametrize(
+    "expression", ["x + 1", "__import__('os')", "(1).real", "abs(-1)"]
+)
+def test_rejects_names_attributes_and_calls(expression):
+    assert _calculate(expression) == "Error: Invalid characters in expression"
+
+
+@pytest.mark.parametrize(
+    "expression", ["(1)(2)", "9 ** 9 ** 9 ** 9", "(2 ** 100) ** 100", "2 ** 1000000"]
+)
+def test_rejects_calls_and_huge_exponents(expression):
+    assert _calculate(expression).startswith("Error: ")
+
+
+@pytest.mark.parametrize("expression", ["", "   ", "1 +", "()"])
+def test_rejects_empty_and_incomplete_input(expression):
+    assert _calculate(expression).startswith("Error: ")
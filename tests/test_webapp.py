@@ -0,0 +1,58 @@
+"""Tests for the FastAPI streaming endpoint."""
+
+import json
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from src.agent import webapp
+from src.agent.trip_graph import TripState
+
+DRAFT = "Day 1: Louvre. Day 2: Versailles."
+
+
+def _draft_graph():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=DRAFT)]))
+
+    def generate(state):
+        response = llm.invoke(state["messages"])
+        status = AIMessage(
+            content=f"✍️ **Step 3: Itinerary Created**\n\n{response.content}"
+        )
+        return {"draft": response.content, "messages": [status]}
+
+    builder = StateGraph(TripState)
+    builder.add_node("generate", generate)
+    builder.add_edge(START, "generate")
+    builder.add_edge("generate", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def _stream_events(monkeypatch, graph):
+    monkeypatch.setattr(webapp, "get_graph", lambda use_hitl=True: graph)
+    response = TestClient(webapp.app).post(
+        "/runs/stream", json={"thread_id": "t", "message": "Paris", "use_hitl": False}
+    )
+    assert response.status_code == 200
+    return [
+        json.loads(line[len("data: ") :])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_stream_forwards_only_llm_tokens(monkeypatch):
+    events = _stream_events(monkeypatch, _draft_graph())
+
+    tokens = [e for e in events if e["event"] == "token"]
+    assert len(tokens) > 1
+    assert {e["node"] for e in tokens} == {"generate"}
+    # The node's finished status message is not replayed as a token
+    assert "".join(e["content"] for e in tokens) == DRAFT
+
+    node_events = [e for e in events if e["event"] == "node"]
+    assert node_events[0]["data"]["message"]["content"].startswith("✍️ **Step 3")
+    assert events[-1] == {"event": "complete"}